@@ -162,6 +162,20 @@ class Conta(AuditoriaModel):
         indexes = [
             models.Index(fields=["usuario", "tipo", "data_prevista"]),
             models.Index(fields=["usuario", "transacao_realizada", "data_realizacao"]),
+            # Índice de cobertura dos relatórios por período: as colunas lidas na
+            # exportação ficam no próprio índice (Index Only Scan no PostgreSQL).
+            models.Index(
+                fields=["usuario", "data_prevista"],
+                include=["tipo", "valor", "cartao", "eh_fatura_cartao", "categoria"],
+                name="conta_rel_cover_idx",
+            ),
+            # Índice parcial com o mesmo predicado de visibilidade dos relatórios:
+            # contas de caixa (sem cartão) e faturas consolidadas.
+            models.Index(
+                fields=["usuario", "data_prevista"],
+                condition=models.Q(cartao__isnull=True) | models.Q(eh_fatura_cartao=True),
+                name="conta_exportaveis_idx",
+            ),
         ]
 
     def __str__(self):
@@ -11,6 +11,13 @@ from core.models import ConfigUsuario, Categoria
 
 User = get_user_model()
 
+# Categorias criadas para todo usuário novo: (nome, tipo)
+_CATEGORIAS_PADRAO = (
+    ("Receita", Categoria.TIPO_RECEITA),
+    ("Gastos", Categoria.TIPO_DESPESA),
+    ("Investimento", Categoria.TIPO_INVESTIMENTO),
+)
+
 
 def criar_usuario_com_ecosistema(username, senha):
     """Cria uma nova conta de usuário, inicializando suas configurações e categorias padrão.
@@ -30,21 +37,20 @@ def criar_usuario_com_ecosistema(username, senha):
     # Config do usuário
     ConfigUsuario.objects.get_or_create(usuario=usuario)
 
-    # Categorias padrão
-    Categoria.objects.get_or_create(
-        usuario=usuario,
-        nome="Receita",
-        defaults={"tipo": Categoria.TIPO_RECEITA, "is_default": True},
-    )
-    Categoria.objects.get_or_create(
-        usuario=usuario,
-        nome="Gastos",
-        defaults={"tipo": Categoria.TIPO_DESPESA, "is_default": True},
+    # Categorias padrão: um SELECT das existentes e um único INSERT das que
+    # faltam, em vez de um get_or_create por nome
+    existentes = set(
+        Categoria.objects.filter(
+            usuario=usuario, nome__in=[nome for nome, _ in _CATEGORIAS_PADRAO]
+        ).values_list("nome", flat=True)
     )
-    Categoria.objects.get_or_create(
-        usuario=usuario,
-        nome="Investimento",
-        defaults={"tipo": Categoria.TIPO_INVESTIMENTO, "is_default": True},
+    Categoria.objects.bulk_create(
+        [
+            Categoria(usuario=usuario, nome=nome, tipo=tipo, is_default=True)
+            for nome, tipo in _CATEGORIAS_PADRAO
+            if nome not in existentes
+        ],
+        ignore_conflicts=True,
     )
 
     return usuario
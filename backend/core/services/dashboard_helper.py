@@ -582,26 +582,33 @@ def resumo_ultimos_3_meses_competencia(usuario, inicio_ref: date) -> list[dict]:
     Returns:
         list[dict]: Lista de dicionários contendo o fechamento mensal agrupado.
     """
-    itens = []
-
-    for i in range(0, 3):
-        inicio_mes = (inicio_ref - relativedelta(months=i)).replace(day=1)
-        fim_mes = (inicio_mes + relativedelta(months=1)).replace(day=1)
+    inicio_mes_ref = inicio_ref.replace(day=1)
 
-        qs = Conta.objects.filter(
+    # Receitas e gastos dos 3 meses em uma única consulta agrupada por mês,
+    # em vez de dois aggregates por mês
+    qs = (
+        Conta.objects.filter(
             usuario=usuario,
-            data_prevista__gte=inicio_mes,
-            data_prevista__lt=fim_mes,
-        ).filter(Q(cartao__isnull=True) | Q(eh_fatura_cartao=True))
-
-        receita = (
-            qs.filter(tipo=Conta.TIPO_RECEITA).aggregate(total=Sum("valor"))["total"]
-            or 0
+            data_prevista__gte=inicio_mes_ref - relativedelta(months=2),
+            data_prevista__lt=inicio_mes_ref + relativedelta(months=1),
         )
-        gastos = (
-            qs.filter(tipo=Conta.TIPO_DESPESA).aggregate(total=Sum("valor"))["total"]
-            or 0
+        .filter(Q(cartao__isnull=True) | Q(eh_fatura_cartao=True))
+        .annotate(mes=TruncMonth("data_prevista"))
+        .values("mes")
+        .annotate(
+            receita=Sum("valor", filter=Q(tipo=Conta.TIPO_RECEITA)),
+            gastos=Sum("valor", filter=Q(tipo=Conta.TIPO_DESPESA)),
         )
+        .order_by("mes")
+    )
+    mapa = {strip_tz(row["mes"]).replace(day=1): row for row in qs}
+
+    itens = []
+    for i in range(0, 3):
+        inicio_mes = (inicio_ref - relativedelta(months=i)).replace(day=1)
+        row = mapa.get(inicio_mes, {})
+        receita = row.get("receita") or 0
+        gastos = row.get("gastos") or 0
 
         itens.append(
             {
@@ -6,29 +6,162 @@ import io
 from datetime import date
 from decimal import Decimal
 
-from django.db.models import Q
+from django.db.models import Exists, FloatField, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Cast
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
 from reportlab.platypus import (
-    SimpleDocTemplate,
+    Frame,
+    LongTable,
     Table,
     TableStyle,
     Paragraph,
     Spacer,
     PageBreak,
 )
+from reportlab.platypus.doctemplate import LayoutError
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.legends import Legend
 
 from django.db.models import Sum
+from django.db.models.functions import TruncMonth
 from core.models import Conta
-from investimento.models import Ativo, Transacao as TransacaoInvestimento
+from investimento.models import Ativo, Cotacao, SubcategoriaAtivo, Transacao as TransacaoInvestimento
+
+
+# Estilos das planilhas, criados uma única vez e compartilhados por todas as células
+_HEADER_FONT = Font(bold=True, color="FFFFFF")
+_HEADER_FILL = PatternFill(start_color="10B981", end_color="10B981", fill_type="solid")
+_HEADER_FILL_BLUE = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
+_HEADER_ALIGN = Alignment(horizontal="center", vertical="center")
+_THIN_BORDER = Border(
+    left=Side(style="thin"),
+    right=Side(style="thin"),
+    top=Side(style="thin"),
+    bottom=Side(style="thin"),
+)
+_TITLE_FONT = Font(bold=True, size=14)
+_RIGHT_ALIGN = Alignment(horizontal="right")
+_NUMFMT_2 = "#,##0.00"
+_NUMFMT_PCT = '0.00"%"'
+_NUMFMT_DATA = "DD/MM/YYYY"
+
+# Rótulos dos tipos de transação, resolvidos por dicionário em vez de
+# `get_tipo_display()` a cada linha
+_TIPO_TRANSACAO_LABEL = dict(TransacaoInvestimento.TIPO_CHOICES)
+# Nos relatórios tudo o que não é receita aparece como despesa
+_TIPO_CONTA_LABEL = {Conta.TIPO_RECEITA: "Receita"}
+
+# Colunas lidas das movimentações nas listagens, como tuplas em vez de instâncias
+_COLUNAS_MOVIMENTACAO = (
+    "data_prevista", "tipo", "descricao", "categoria__nome", "valor", "transacao_realizada",
+)
+# Na planilha o valor vai como número de ponto flutuante: a conversão é feita no
+# banco (anotação "valor_float"), sem float(Decimal) por linha em Python
+_COLUNAS_MOVIMENTACAO_EXCEL = tuple(
+    "valor_float" if c == "valor" else c for c in _COLUNAS_MOVIMENTACAO
+)
+
+# Troca "," por "." e vice-versa em uma única passada: 1,234.56 -> 1.234,56
+_SEPARADORES_BR = str.maketrans({",": ".", ".": ","})
+
+
+def _num(valor) -> str:
+    """Formata um número com duas casas no padrão brasileiro (ex: 1.234,56).
+
+    Args:
+        valor (Decimal | float): Valor numérico a formatar.
+
+    Returns:
+        str: Número com separador de milhar "." e decimal ",".
+    """
+    return f"{valor:,.2f}".translate(_SEPARADORES_BR)
+
+
+def _brl(valor) -> str:
+    """Formata um valor monetário em reais (ex: R$ 1.234,56).
+
+    Args:
+        valor (Decimal | float): Valor monetário a formatar.
+
+    Returns:
+        str: Valor prefixado com "R$" no padrão brasileiro.
+    """
+    return "R$ " + _num(valor)
+
+
+def _anotar_cotacao_recente(qs):
+    """Anota em cada ativo a cotação mais recente (`cotacao_recente`) na própria consulta.
+
+    Evita a consulta extra por ativo feita por `Ativo.valor_total_atual`, que os
+    relatórios chamavam mais de uma vez para cada posição.
+
+    Args:
+        qs (QuerySet): Consulta de ativos a ser anotada.
+
+    Returns:
+        QuerySet: A mesma consulta com o campo `cotacao_recente` (ou None sem cotações).
+    """
+    ultima = (
+        Cotacao.objects.filter(ativo=OuterRef("pk"))
+        .order_by("-data", "-criada_em")
+        .values("valor")[:1]
+    )
+    return qs.annotate(cotacao_recente=Subquery(ultima))
+
+
+def _prefetch_classificacao():
+    """Monta o prefetch da cadeia subcategoria → categoria → classe dos ativos.
+
+    Poucas subcategorias se repetem em muitos ativos, então elas vêm em uma consulta
+    à parte em vez de alargar cada linha de ativo com o join das três tabelas.
+
+    Returns:
+        Prefetch: Prefetch de `subcategoria` com categoria e classe já carregadas.
+    """
+    return Prefetch(
+        "subcategoria",
+        queryset=SubcategoriaAtivo.objects.select_related("categoria__classe").only(
+            "nome", "categoria__nome", "categoria__classe__nome"
+        ),
+    )
+
+
+def _valor_mercado(ativo) -> Decimal:
+    """Valor de mercado da posição, com a mesma regra de `Ativo.valor_total_atual`.
+
+    Args:
+        ativo (Ativo): Ativo anotado por `_anotar_cotacao_recente`.
+
+    Returns:
+        Decimal: Quantidade vezes a cotação mais recente, ou o valor investido sem cotação.
+    """
+    if ativo.cotacao_recente is not None:
+        return ativo.quantidade * ativo.cotacao_recente
+    return ativo.valor_investido
+
+
+def _centavos(valor) -> int:
+    """Arredonda um valor monetário para centavos inteiros.
+
+    Os totais do relatório só servem para exibição (já são convertidos em float na
+    saída), então são acumulados em `int`, bem mais barato que somar `Decimal`.
+
+    Args:
+        valor (Decimal): Valor em reais.
+
+    Returns:
+        int: Valor em centavos.
+    """
+    return round(valor * 100)
 
 
 def get_movimentacoes(usuario, data_inicio: date, data_fim: date):
@@ -37,6 +170,10 @@ def get_movimentacoes(usuario, data_inicio: date, data_fim: date):
     Exclui despesas de cartão individuais para evitar duplicidade de lançamentos,
     retornando apenas contas de caixa (sem cartão associado) e faturas de cartão consolidadas.
 
+    Os consumidores leem apenas tuplas (``values_list``) ou agregados, então a
+    categoria entra pelo JOIN da própria coluna ``categoria__nome`` em vez de
+    ``select_related``, sem materializar instâncias relacionadas.
+
     Args:
         usuario (User): Instância do usuário Django proprietário.
         data_inicio (date): Limite inferior do período de busca.
@@ -55,7 +192,6 @@ def get_movimentacoes(usuario, data_inicio: date, data_fim: date):
             # Apenas contas sem cartão OU faturas de cartão
             Q(cartao__isnull=True) | Q(eh_fatura_cartao=True)
         )
-        .select_related("categoria", "cartao")
         .order_by("data_prevista", "id")
     )
     return qs
@@ -72,18 +208,26 @@ def get_investimentos(usuario, data_inicio: date, data_fim: date):
     Returns:
         QuerySet: Filtro de ativos B3 ordenados pelo ticker alfabeticamente.
     """
-    # Ativos com posição > 0 ou com transações no período
-    ativos_com_transacoes = TransacaoInvestimento.objects.filter(
+    # Ativos com posição > 0 ou com transações no período (semi-join via EXISTS)
+    transacoes_no_periodo = TransacaoInvestimento.objects.filter(
         usuario=usuario,
+        ativo_id=OuterRef("pk"),
         data__gte=data_inicio,
         data__lte=data_fim,
-    ).values_list("ativo_id", flat=True)
+    )
 
     qs = (
-        Ativo.objects.filter(
-            Q(usuario=usuario) & (Q(quantidade__gt=0) | Q(id__in=ativos_com_transacoes))
+        _anotar_cotacao_recente(Ativo.objects.filter(usuario=usuario))
+        .filter(Q(quantidade__gt=0) | Exists(transacoes_no_periodo))
+        .prefetch_related(_prefetch_classificacao())
+        .only(
+            "ticker",
+            "nome",
+            "quantidade",
+            "preco_medio",
+            "meta_porcentagem",
+            "subcategoria",
         )
-        .select_related("subcategoria__categoria__classe")
         .order_by("ticker")
     )
     return qs
@@ -107,6 +251,15 @@ def get_transacoes_investimento(usuario, data_inicio: date, data_fim: date):
             data__lte=data_fim,
         )
         .select_related("ativo")
+        .only(
+            "data",
+            "tipo",
+            "quantidade",
+            "preco_unitario",
+            "taxas",
+            "valor_total",
+            "ativo__ticker",
+        )
         .order_by("data", "id")
     )
     return qs
@@ -147,31 +300,50 @@ def get_alocacao_data(usuario, data_fim: date):
         data_fim (date): Data limite para consideração de saldo na custódia.
 
     Returns:
-        list[dict]: Lista de dicionários ordenada com 'classe', 'valor' e 'percentual'.
+        list[dict]: Lista de dicionários ordenada com 'classe', 'valor' e 'percentual',
+            ambos em float.
     """
-    ativos = Ativo.objects.filter(usuario=usuario, quantidade__gt=0).select_related(
-        "subcategoria__categoria__classe"
-    )
+    ativos = _anotar_cotacao_recente(
+        Ativo.objects.filter(usuario=usuario, quantidade__gt=0)
+    ).prefetch_related(_prefetch_classificacao()).only("quantidade", "preco_medio", "subcategoria")
+    return _alocacao_por_classe(ativos)
+
 
-    total_portfolio = Decimal("0.00")
+def _alocacao_por_classe(ativos):
+    """Agrupa o valor de mercado das posições em custódia por classe de ativo.
+
+    Recebe ativos já anotados por `_anotar_cotacao_recente` e com a classificação
+    pré-carregada, como os de `get_investimentos`: os relatórios que já leram a
+    carteira montam a alocação a partir dela, sem consultar os ativos de novo.
+
+    Args:
+        ativos (Iterable[Ativo]): Ativos anotados; os sem quantidade são ignorados.
+
+    Returns:
+        list[dict]: Lista de dicionários ordenada com 'classe', 'valor' e 'percentual',
+            ambos em float.
+    """
+    total_centavos = 0
     alocacao = {}
 
     for ativo in ativos:
-        valor = ativo.valor_total_atual
-        total_portfolio += valor
+        if ativo.quantidade <= 0:
+            continue
+        centavos = _centavos(_valor_mercado(ativo))
+        total_centavos += centavos
         classe_nome = (
             ativo.subcategoria.categoria.classe.nome
             if ativo.subcategoria
             else "Outros"
         )
-        alocacao[classe_nome] = alocacao.get(classe_nome, Decimal("0.00")) + valor
+        alocacao[classe_nome] = alocacao.get(classe_nome, 0) + centavos
 
     # Converter para percentual
     dados = []
-    if total_portfolio > 0:
-        for classe, valor in alocacao.items():
-            percentual = (valor / total_portfolio) * 100
-            dados.append({"classe": classe, "valor": valor, "percentual": percentual})
+    if total_centavos > 0:
+        for classe, centavos in alocacao.items():
+            percentual = centavos * 100 / total_centavos
+            dados.append({"classe": classe, "valor": centavos / 100, "percentual": percentual})
 
     return sorted(dados, key=lambda x: x["valor"], reverse=True)
 
@@ -190,34 +362,33 @@ def get_comparativo_mensal_data(usuario, data_inicio: date, data_fim: date):
     Returns:
         list[dict]: Lista contendo dicionários com 'periodo', 'receitas', 'despesas' e 'saldo'.
     """
-    movs = Conta.objects.filter(
-        usuario=usuario,
-        data_prevista__gte=data_inicio,
-        data_prevista__lte=data_fim,
-    ).filter(Q(cartao__isnull=True) | Q(eh_fatura_cartao=True))
-
-    comparativo = {}
-
-    for m in movs:
-        mes_ano = m.data_prevista.strftime("%Y-%m")
-        if mes_ano not in comparativo:
-            comparativo[mes_ano] = {"receitas": Decimal("0"), "despesas": Decimal("0")}
-
-        if m.tipo == Conta.TIPO_RECEITA:
-            comparativo[mes_ano]["receitas"] += m.valor
-        else:
-            comparativo[mes_ano]["despesas"] += m.valor
+    # Soma por mês feita no banco: receitas de um lado, demais tipos como despesa
+    meses = (
+        Conta.objects.filter(
+            usuario=usuario,
+            data_prevista__gte=data_inicio,
+            data_prevista__lte=data_fim,
+        )
+        .filter(Q(cartao__isnull=True) | Q(eh_fatura_cartao=True))
+        .annotate(mes=TruncMonth("data_prevista"))
+        .values("mes")
+        .annotate(
+            receitas=Sum("valor", filter=Q(tipo=Conta.TIPO_RECEITA)),
+            despesas=Sum("valor", filter=~Q(tipo=Conta.TIPO_RECEITA)),
+        )
+        .order_by("mes")
+    )
 
-    # Transformar em lista ordenada
     resultado = []
-    for chave in sorted(comparativo.keys()):
-        item = comparativo[chave]
+    for item in meses:
+        receitas = item["receitas"] or Decimal("0")
+        despesas = item["despesas"] or Decimal("0")
         resultado.append(
             {
-                "periodo": chave,
-                "receitas": item["receitas"],
-                "despesas": item["despesas"],
-                "saldo": item["receitas"] - item["despesas"],
+                "periodo": item["mes"].strftime("%Y-%m"),
+                "receitas": receitas,
+                "despesas": despesas,
+                "saldo": receitas - despesas,
             }
         )
     return resultado
@@ -225,12 +396,47 @@ def get_comparativo_mensal_data(usuario, data_inicio: date, data_fim: date):
 
 
 
+def _celula(ws, valor, estilo=None, **estilos):
+    """Cria uma célula de planilha write-only com os estilos informados.
+
+    Args:
+        ws (WriteOnlyWorksheet): Aba de destino da célula.
+        valor (any): Conteúdo da célula.
+        estilo (StyleArray, optional): Estilo já registrado por `_estilo`, atribuído
+            diretamente à célula. Defaults to None.
+        **estilos: Atributos de estilo avulsos (font, fill, alignment, border, number_format).
+
+    Returns:
+        WriteOnlyCell: Célula pronta para ser anexada com `ws.append`.
+    """
+    cell = WriteOnlyCell(ws, value=valor)
+    if estilo is not None:
+        cell._style = estilo
+    for nome, valor_estilo in estilos.items():
+        setattr(cell, nome, valor_estilo)
+    return cell
+
+
+def _estilo(ws, **estilos):
+    """Registra uma combinação de estilos no workbook e devolve seu StyleArray.
+
+    Cada atribuição de `border`, `font` etc. em uma célula procura o objeto nas
+    coleções de estilos do workbook. Registrando a combinação uma vez por aba, as
+    células das linhas de dados recebem o StyleArray pronto, sem essas buscas.
+
+    Args:
+        ws (WriteOnlyWorksheet): Aba cujo workbook receberá os estilos.
+        **estilos: Atributos de estilo (font, fill, alignment, border, number_format).
+
+    Returns:
+        StyleArray: Índices dos estilos registrados, compartilháveis entre células.
+    """
+    return _celula(ws, None, **estilos)._style
+
+
 def gerar_excel(usuario, data_inicio: date, data_fim: date, escopo: str = "completo") -> bytes:
     """Gera um arquivo de planilha Excel (.xlsx) contendo movimentações, investimentos e transações.
 
-    Gera abas dinâmicas como 'Movimentações', 'Resumo Mensal', 'Carteira', 'Proventos',
-    'Alocação' e 'Transações Invest.' dependendo do escopo selecionado.
-
     Args:
         usuario (User): Instância do usuário Django solicitante.
         data_inicio (date): Data de início para o filtro do relatório.
@@ -240,24 +446,40 @@ def gerar_excel(usuario, data_inicio: date, data_fim: date, escopo: str = "compl
     Returns:
         bytes: O conteúdo em bytes da planilha gerada em formato openxml (.xlsx).
     """
-    wb = Workbook()
+    output = io.BytesIO()
+    escrever_excel(output, usuario, data_inicio, data_fim, escopo)
+    return output.getvalue()
+
+
+def escrever_excel(destino, usuario, data_inicio: date, data_fim: date, escopo: str = "completo"):
+    """Grava a planilha Excel (.xlsx) do relatório diretamente em um destino file-like.
+
+    Gera abas dinâmicas como 'Movimentações', 'Resumo Mensal', 'Carteira', 'Proventos',
+    'Alocação' e 'Transações Invest.' dependendo do escopo selecionado. A planilha é
+    montada em modo write-only: cada linha é gravada em streaming com `ws.append`,
+    sem manter todas as células em memória até o salvamento. Gravando direto na
+    `HttpResponse`, o arquivo não passa por um buffer intermediário.
+
+    Args:
+        destino (file-like): Objeto com `write` que recebe o arquivo (ex: HttpResponse).
+        usuario (User): Instância do usuário Django solicitante.
+        data_inicio (date): Data de início para o filtro do relatório.
+        data_fim (date): Data final para o filtro do relatório.
+        escopo (str, optional): Escopo do relatório ('geral', 'investimentos', 'completo'). Defaults to "completo".
+    """
+    wb = Workbook(write_only=True)
     wb.properties.title = f"Relatório Financeiro {data_inicio.strftime('%d-%m-%Y')} a {data_fim.strftime('%d-%m-%Y')}"
     wb.properties.creator = "FreeCash"
 
-    # Estilos comuns
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="10B981", end_color="10B981", fill_type="solid")
-    header_fill_blue = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+    # Combinações de estilo registradas uma única vez no workbook e reaproveitadas
+    # por todas as abas, inclusive os cabeçalhos (o StyleArray vale para o workbook)
+    estilos = {}
 
-    # Remover aba padrão para criar as específicas
-    wb.remove(wb.active)
+    def estilo(ws, **atributos):
+        chave = tuple(sorted(atributos.items()))
+        if chave not in estilos:
+            estilos[chave] = _estilo(ws, **atributos)
+        return estilos[chave]
 
     # =====================
     # ABA: MOVIMENTAÇÕES
@@ -266,40 +488,55 @@ def gerar_excel(usuario, data_inicio: date, data_fim: date, escopo: str = "compl
         movimentacoes = get_movimentacoes(usuario, data_inicio, data_fim)
         ws = wb.create_sheet("Movimentações")
 
-        # Título
-        ws.merge_cells("A1:F1")
-        ws["A1"] = f"Relatório de Movimentações - {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
-        ws["A1"].font = Font(bold=True, size=14)
-        ws["A1"].alignment = Alignment(horizontal="center")
+        # Título (planilhas write-only não suportam mesclar A1:F1; o texto transborda à direita)
+        ws.append([_celula(
+            ws,
+            f"Relatório de Movimentações - {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}",
+            font=_TITLE_FONT,
+        )])
+        ws.append([])
 
         headers = ["Data", "Tipo", "Descrição", "Categoria", "Valor (R$)", "Status"]
-        for col, h in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col, value=h)
-            cell.font = header_font; cell.fill = header_fill; cell.alignment = header_alignment; cell.border = thin_border
-
-        total_receitas = total_despesas = Decimal("0.00")
-        for row_num, mov in enumerate(movimentacoes, 4):
-            tipo_label = "Receita" if mov.tipo == Conta.TIPO_RECEITA else "Despesa"
-            if mov.tipo == Conta.TIPO_RECEITA: total_receitas += mov.valor
-            else: total_despesas += mov.valor
-
-            data = [mov.data_prevista.strftime("%d/%m/%Y"), tipo_label, mov.descricao, 
-                    mov.categoria.nome if mov.categoria else "Sem cat.", float(mov.valor), 
-                    "Realizada" if mov.transacao_realizada else "Pendente"]
-            for col, val in enumerate(data, 1):
-                cell = ws.cell(row=row_num, column=col, value=val)
-                cell.border = thin_border
-                if col == 5: cell.number_format = "#,##0.00"; cell.alignment = Alignment(horizontal="right")
+        ws.append([
+            _celula(ws, h, estilo(ws, font=_HEADER_FONT, fill=_HEADER_FILL, alignment=_HEADER_ALIGN, border=_THIN_BORDER))
+            for h in headers
+        ])
+
+        estilo_borda = estilo(ws, border=_THIN_BORDER)
+        # Datas vão como células de data formatadas, sem strftime por linha
+        estilo_data = estilo(ws, border=_THIN_BORDER, number_format=_NUMFMT_DATA)
+        estilo_valor = estilo(ws, border=_THIN_BORDER, number_format=_NUMFMT_2, alignment=_RIGHT_ALIGN)
+        linhas = (
+            movimentacoes.annotate(valor_float=Cast("valor", FloatField()))
+            .values_list(*_COLUNAS_MOVIMENTACAO_EXCEL)
+            .iterator(chunk_size=2000)
+        )
+        # Método ligado a uma variável local: evita a busca do atributo a cada linha
+        append = ws.append
+        for data_prevista, tipo, descricao, categoria, valor, realizada in linhas:
+            append([
+                _celula(ws, data_prevista, estilo_data),
+                _celula(ws, _TIPO_CONTA_LABEL.get(tipo, "Despesa"), estilo_borda),
+                _celula(ws, descricao, estilo_borda),
+                _celula(ws, categoria if categoria is not None else "Sem cat.", estilo_borda),
+                _celula(ws, valor, estilo_valor),
+                _celula(ws, "Realizada" if realizada else "Pendente", estilo_borda),
+            ])
 
         # Resumo Mensal (Comparativo) na mesma aba ou nova? Vamos fazer nova aba por organização
         comp_data = get_comparativo_mensal_data(usuario, data_inicio, data_fim)
         ws_comp = wb.create_sheet("Resumo Mensal")
-        ws_comp.append(["Mês/Ano", "Receitas", "Despesas", "Saldo"])
-        for c in ws_comp[1]: c.font = header_font; c.fill = header_fill; c.border = thin_border
+        ws_comp.append([
+            _celula(ws_comp, h, estilo(ws_comp, font=_HEADER_FONT, fill=_HEADER_FILL, border=_THIN_BORDER))
+            for h in ["Mês/Ano", "Receitas", "Despesas", "Saldo"]
+        ])
+        estilo_numero = estilo(ws_comp, number_format=_NUMFMT_2)
+        append = ws_comp.append
         for item in comp_data:
-            ws_comp.append([item["periodo"], float(item["receitas"]), float(item["despesas"]), float(item["saldo"])])
-        for row in ws_comp.iter_rows(min_row=2):
-            for cell in row[1:]: cell.number_format = "#,##0.00"
+            append([item["periodo"]] + [
+                _celula(ws_comp, float(item[k]), estilo_numero)
+                for k in ("receitas", "despesas", "saldo")
+            ])
 
     # =====================
     # SEÇÃO: INVESTIMENTOS
@@ -308,65 +545,82 @@ def gerar_excel(usuario, data_inicio: date, data_fim: date, escopo: str = "compl
         investimentos = get_investimentos(usuario, data_inicio, data_fim)
         ws_inv = wb.create_sheet("Carteira")
         invest_headers = ["Ticker", "Nome", "Classe", "Categoria", "Quantidade", "P. Médio", "Investido", "Mercado", "Meta (%)", "Valor Ideal", "Sugestão", "Lucro/Prej."]
-        for col, h in enumerate(invest_headers, 1):
-            cell = ws_inv.cell(row=1, column=col, value=h)
-            cell.font = header_font; cell.fill = header_fill_blue; cell.border = thin_border
+        ws_inv.append([
+            _celula(ws_inv, h, estilo(ws_inv, font=_HEADER_FONT, fill=_HEADER_FILL_BLUE, border=_THIN_BORDER))
+            for h in invest_headers
+        ])
 
-        total_portfolio = sum(a.valor_total_atual for a in investimentos)
+        total_portfolio = sum(_centavos(_valor_mercado(a)) for a in investimentos) / 100
 
-        for row_num, ativo in enumerate(investimentos, 2):
+        # Colunas 1-4 só com borda, 5 em diante numéricas e a 9 (meta) em percentual
+        estilo_borda = estilo(ws_inv, border=_THIN_BORDER)
+        estilo_numero = estilo(ws_inv, border=_THIN_BORDER, number_format=_NUMFMT_2)
+        estilo_pct = estilo(ws_inv, border=_THIN_BORDER, number_format=_NUMFMT_PCT)
+        estilos_colunas = [estilo_borda] * 4 + [estilo_numero] * 4 + [estilo_pct] + [estilo_numero] * 3
+
+        append = ws_inv.append
+        for ativo in investimentos:
             val_inv = ativo.valor_investido
-            val_mer = ativo.valor_total_atual
+            val_mer = _valor_mercado(ativo)
             meta = ativo.meta_porcentagem
-            val_ideal = (meta / 100) * total_portfolio if total_portfolio > 0 else 0
-            sugestao = val_ideal - val_mer
-            
+            val_ideal = float(meta) / 100 * total_portfolio if total_portfolio > 0 else 0
+            sugestao = val_ideal - float(val_mer)
+
             data = [
-                ativo.ticker, ativo.nome or "", 
+                ativo.ticker, ativo.nome or "",
                 ativo.subcategoria.categoria.classe.nome if ativo.subcategoria else "",
                 ativo.subcategoria.categoria.nome if ativo.subcategoria else "",
-                float(ativo.quantidade), float(ativo.preco_medio), float(val_inv), 
+                float(ativo.quantidade), float(ativo.preco_medio), float(val_inv),
                 float(val_mer), float(meta), float(val_ideal), float(sugestao), float(val_mer - val_inv)
             ]
-            for col, val in enumerate(data, 1):
-                cell = ws_inv.cell(row=row_num, column=col, value=val)
-                cell.border = thin_border
-                if col >= 5: cell.number_format = "#,##0.00"
-                if col == 9: cell.number_format = "0.00\"%\""
+            append([_celula(ws_inv, val, estilo) for val, estilo in zip(data, estilos_colunas)])
 
         # Aba de Proventos
         proventos = get_proventos_data(usuario, data_inicio, data_fim)
         ws_prov = wb.create_sheet("Proventos")
-        ws_prov.append(["Ticker", "Total Recebido (R$)"])
-        for c in ws_prov[1]: c.font = header_font; c.fill = header_fill_blue; c.border = thin_border
+        ws_prov.append([
+            _celula(ws_prov, h, estilo(ws_prov, font=_HEADER_FONT, fill=_HEADER_FILL_BLUE, border=_THIN_BORDER))
+            for h in ["Ticker", "Total Recebido (R$)"]
+        ])
+        estilo_numero = estilo(ws_prov, number_format=_NUMFMT_2)
+        append = ws_prov.append
         for p in proventos:
-            ws_prov.append([p["ativo__ticker"], float(p["total"])])
-            ws_prov.cell(row=ws_prov.max_row, column=2).number_format = "#,##0.00"
+            append([p["ativo__ticker"], _celula(ws_prov, float(p["total"]), estilo_numero)])
 
-        # Aba de Alocação
-        aloc = get_alocacao_data(usuario, data_fim)
+        # Aba de Alocação, a partir da carteira já carregada acima
+        aloc = _alocacao_por_classe(investimentos)
         ws_aloc = wb.create_sheet("Alocação")
-        ws_aloc.append(["Classe", "Valor (R$)", "Percentual (%)"])
-        for c in ws_aloc[1]: c.font = header_font; c.fill = header_fill_blue; c.border = thin_border
+        ws_aloc.append([
+            _celula(ws_aloc, h, estilo(ws_aloc, font=_HEADER_FONT, fill=_HEADER_FILL_BLUE, border=_THIN_BORDER))
+            for h in ["Classe", "Valor (R$)", "Percentual (%)"]
+        ])
+        estilo_numero = estilo(ws_aloc, number_format=_NUMFMT_2)
+        estilo_pct = estilo(ws_aloc, number_format=_NUMFMT_PCT)
+        append = ws_aloc.append
         for a in aloc:
-            ws_aloc.append([a["classe"], float(a["valor"]), float(a["percentual"])])
-            ws_aloc.cell(row=ws_aloc.max_row, column=2).number_format = "#,##0.00"
-            ws_aloc.cell(row=ws_aloc.max_row, column=3).number_format = "0.00\"%\""
+            append([
+                a["classe"],
+                _celula(ws_aloc, float(a["valor"]), estilo_numero),
+                _celula(ws_aloc, float(a["percentual"]), estilo_pct),
+            ])
 
         # Aba de Transações
         transacoes_invest = get_transacoes_investimento(usuario, data_inicio, data_fim)
         ws_tr = wb.create_sheet("Transações Invest.")
-        ws_tr.append(["Data", "Ticker", "Tipo", "Qtd", "Preço", "Taxas", "Total"])
-        for c in ws_tr[1]: c.font = header_font; c.fill = header_fill_blue; c.border = thin_border
-        for t in transacoes_invest:
-            ws_tr.append([t.data.strftime("%d/%m/%Y"), t.ativo.ticker, t.get_tipo_display(), float(t.quantidade), float(t.preco_unitario), float(t.taxas), float(t.valor_total)])
-            for col in range(4, 8): ws_tr.cell(row=ws_tr.max_row, column=col).number_format = "#,##0.00"
+        ws_tr.append([
+            _celula(ws_tr, h, estilo(ws_tr, font=_HEADER_FONT, fill=_HEADER_FILL_BLUE, border=_THIN_BORDER))
+            for h in ["Data", "Ticker", "Tipo", "Qtd", "Preço", "Taxas", "Total"]
+        ])
+        estilo_numero = estilo(ws_tr, number_format=_NUMFMT_2)
+        estilo_data = estilo(ws_tr, number_format=_NUMFMT_DATA)
+        append = ws_tr.append
+        for t in transacoes_invest.iterator(chunk_size=2000):
+            append([_celula(ws_tr, t.data, estilo_data), t.ativo.ticker, _TIPO_TRANSACAO_LABEL.get(t.tipo, "")] + [
+                _celula(ws_tr, float(v), estilo_numero)
+                for v in (t.quantidade, t.preco_unitario, t.taxas, t.valor_total)
+            ])
 
-    # Salvar em bytes
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output.getvalue()
+    wb.save(destino)
 
 
 def render_grafico_alocacao(alocacao_dados) -> Drawing:
@@ -418,38 +672,148 @@ def render_grafico_alocacao(alocacao_dados) -> Drawing:
     return d
 
 
+# Estilos das tabelas do PDF, montados uma única vez no carregamento do módulo
+_PDF_ESTILO_MOVIMENTACOES = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#10B981")),
+    ("ALIGN", (4, 1), (4, -1), "RIGHT"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+])
+# A cor do saldo na linha de total geral é aplicada à parte, conforme o sinal
+_PDF_ESTILO_COMPARATIVO = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+    ("LINEBELOW", (0, 0), (-1, 0), 1, colors.grey),
+    ("LINEABOVE", (0, -1), (-1, -1), 0.5, colors.grey),
+    ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+])
+_PDF_ESTILO_CARTEIRA = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#3B82F6")),
+    ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+    ("FONTSIZE", (0, 0), (-1, -1), 7),  # Fonte levemente menor para caber tudo
+])
+_PDF_ESTILO_PROVENTOS = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#8B5CF6")),
+    ("ALIGN", (1, 1), (1, -1), "RIGHT"),
+])
+_PDF_ESTILO_TRANSACOES = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#8B5CF6")),
+    ("ALIGN", (3, 1), (-1, -1), "RIGHT"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+])
+
+# Linhas por tabela nas listagens longas do PDF
+_PDF_LINHAS_POR_TABELA = 500
+
+
+def _tabelas_em_blocos(cabecalho, linhas, col_widths, estilo):
+    """Divide uma listagem longa em tabelas de tamanho fixo para o PDF.
+
+    Cada divisão de página de uma tabela refaz o layout de todas as linhas restantes,
+    o que torna listagens com milhares de linhas quadráticas. Em blocos de
+    `_PDF_LINHAS_POR_TABELA` linhas o custo por página fica limitado ao bloco atual.
+
+    Args:
+        cabecalho (list[str]): Linha de títulos, repetida no topo de cada bloco e página.
+        linhas (list[list]): Linhas de dados da listagem.
+        col_widths (list[float]): Larguras fixas das colunas.
+        estilo (TableStyle): Estilo pré-montado aplicado a cada bloco.
+
+    Returns:
+        list[LongTable]: Tabelas na ordem das linhas, prontas para o `elements`.
+    """
+    tabelas = []
+    # Sem linhas, ainda devolve a tabela só com o cabeçalho
+    for inicio in range(0, max(len(linhas), 1), _PDF_LINHAS_POR_TABELA):
+        bloco = [cabecalho] + linhas[inicio:inicio + _PDF_LINHAS_POR_TABELA]
+        tabela = LongTable(bloco, colWidths=col_widths, repeatRows=1)
+        tabela.setStyle(estilo)
+        tabelas.append(tabela)
+    return tabelas
+
+
+def _desenhar_paginas(pdf, elements):
+    """Distribui os flowables do relatório nas páginas do canvas, dividindo tabelas longas.
+
+    Substitui o `SimpleDocTemplate.build`, que repassa o layout de todos os flowables
+    antes de emitir o PDF: aqui cada flowable é posicionado uma única vez em um `Frame`
+    por página e apenas o que não couber é dividido e levado para a página seguinte.
+
+    Args:
+        pdf (Canvas): Canvas do reportlab onde as páginas são desenhadas.
+        elements (list[Flowable]): Flowables do relatório na ordem de exibição.
+
+    Raises:
+        LayoutError: Se um flowable não couber em uma página vazia nem puder ser dividido.
+    """
+    largura, altura = A4
+    pendentes = list(elements)
+
+    while pendentes:
+        frame = Frame(10 * mm, 10 * mm, largura - 20 * mm, altura - 20 * mm)
+        pagina_vazia = True
+
+        while pendentes:
+            flowable = pendentes[0]
+            if isinstance(flowable, PageBreak):
+                pendentes.pop(0)
+                break
+            if frame.add(flowable, pdf, trySplit=1):
+                pendentes.pop(0)
+                pagina_vazia = False
+                continue
+
+            partes = frame.split(flowable, pdf)
+            if len(partes) > 1 and frame.add(partes[0], pdf, trySplit=1):
+                pendentes[0:1] = partes[1:]
+                pagina_vazia = False
+                continue
+
+            if pagina_vazia:
+                raise LayoutError(f"Elemento {flowable.__class__.__name__} não cabe em uma página.")
+            break
+
+        pdf.showPage()
+
+
 def gerar_pdf(usuario, data_inicio: date, data_fim: date, escopo: str = "completo") -> bytes:
     """Gera um documento PDF (.pdf) formatado com as movimentações e investimentos do período.
 
+    Args:
+        usuario (User): Instância do usuário Django solicitante.
+        data_inicio (date): Limite de início para filtragem do relatório.
+        data_fim (date): Limite final para filtragem do relatório.
+        escopo (str, optional): Escopo do relatório ('geral', 'investimentos', 'completo'). Defaults to "completo".
+
+    Returns:
+        bytes: O conteúdo em bytes do arquivo PDF gerado.
+    """
+    buffer = io.BytesIO()
+    escrever_pdf(buffer, usuario, data_inicio, data_fim, escopo)
+    return buffer.getvalue()
+
+
+def escrever_pdf(destino, usuario, data_inicio: date, data_fim: date, escopo: str = "completo"):
+    """Grava o documento PDF do relatório diretamente em um destino file-like.
+
     Estrutura tabelas elegantes de movimentações, comparativos de balanço de caixa,
     tabelas de custódia e proventos de investimentos, além de renderizar o gráfico
     de pizza de alocação de ativos.
 
     Args:
+        destino (file-like): Objeto com `write` que recebe o arquivo (ex: HttpResponse).
         usuario (User): Instância do usuário Django solicitante.
         data_inicio (date): Limite de início para filtragem do relatório.
         data_fim (date): Limite final para filtragem do relatório.
         escopo (str, optional): Escopo do relatório ('geral', 'investimentos', 'completo'). Defaults to "completo".
-
-    Returns:
-        bytes: O conteúdo em bytes do arquivo PDF gerado.
     """
     movimentacoes = get_movimentacoes(usuario, data_inicio, data_fim)
     investimentos = get_investimentos(usuario, data_inicio, data_fim)
     transacoes_invest = get_transacoes_investimento(usuario, data_inicio, data_fim)
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=10 * mm,
-        leftMargin=10 * mm,
-        topMargin=10 * mm,
-        bottomMargin=10 * mm,
-        title=f"Relatório Financeiro {data_inicio.strftime('%d-%m-%Y')} a {data_fim.strftime('%d-%m-%Y')}",
-        author="FreeCash",
-    )
-
     elements = []
     styles = getSampleStyleSheet()
 
@@ -487,32 +851,24 @@ def gerar_pdf(usuario, data_inicio: date, data_fim: date, escopo: str = "complet
         elements.append(section_mov)
 
         # Tabela de movimentações
-        table_data = [["Data", "Tipo", "Descrição", "Categoria", "Valor", "Status"]]
-
-        total_receitas = Decimal("0.00")
-        total_despesas = Decimal("0.00")
-
-        for mov in movimentacoes:
-            tipo_label = "Receita" if mov.tipo == Conta.TIPO_RECEITA else "Despesa"
-            categoria_nome = mov.categoria.nome if mov.categoria else "Sem cat."
-            status = "OK" if mov.transacao_realizada else "Pend."
-
-            if mov.tipo == Conta.TIPO_RECEITA: total_receitas += mov.valor
-            else: total_despesas += mov.valor
-
-            desc = mov.descricao[:30] + "..." if len(mov.descricao) > 30 else mov.descricao
-            table_data.append([mov.data_prevista.strftime("%d/%m/%Y"), tipo_label, desc, categoria_nome[:15], 
-                               f"R$ {mov.valor:,.2f}", status])
-
-        col_widths = [50, 60, 180, 100, 85, 60]
-        table = Table(table_data, colWidths=col_widths)
-        table.setStyle(TableStyle([
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#10B981")),
-            ("ALIGN", (4, 1), (4, -1), "RIGHT"),
-            ("FONTSIZE", (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(table)
+        table_data = []
+
+        linhas = movimentacoes.values_list(*_COLUNAS_MOVIMENTACAO).iterator(chunk_size=2000)
+        for data_prevista, tipo, descricao, categoria, valor, realizada in linhas:
+            tipo_label = _TIPO_CONTA_LABEL.get(tipo, "Despesa")
+            categoria_nome = categoria if categoria is not None else "Sem cat."
+            status = "OK" if realizada else "Pend."
+
+            desc = descricao[:30] + "..." if len(descricao) > 30 else descricao
+            table_data.append([data_prevista.strftime("%d/%m/%Y"), tipo_label, desc, categoria_nome[:15], 
+                               _brl(valor), status])
+
+        elements.extend(_tabelas_em_blocos(
+            ["Data", "Tipo", "Descrição", "Categoria", "Valor", "Status"],
+            table_data,
+            [50, 60, 180, 100, 85, 60],
+            _PDF_ESTILO_MOVIMENTACOES,
+        ))
         elements.append(Spacer(1, 5 * mm))
 
         # Novo: Comparativo Mensal
@@ -520,87 +876,76 @@ def gerar_pdf(usuario, data_inicio: date, data_fim: date, escopo: str = "complet
         comp_data = get_comparativo_mensal_data(usuario, data_inicio, data_fim)
         comp_table_data = [["Período", "Receitas", "Despesas", "Saldo"]]
         
-        t_rec = t_des = Decimal("0.00")
         for c in comp_data:
-            t_rec += c["receitas"]
-            t_des += c["despesas"]
-            comp_table_data.append([c["periodo"], f"R$ {c['receitas']:,.2f}", f"R$ {c['despesas']:,.2f}", f"R$ {c['saldo']:,.2f}"])
+            comp_table_data.append([c["periodo"], _brl(c["receitas"]), _brl(c["despesas"]), _brl(c["saldo"])])
         
-        # Linha de Total Geral
-        comp_table_data.append(["TOTAL GERAL", f"R$ {t_rec:,.2f}", f"R$ {t_des:,.2f}", f"R$ {t_rec - t_des:,.2f}"])
+        # Linha de Total Geral: soma dos totais mensais já agregados no banco
+        t_rec = sum((c["receitas"] for c in comp_data), Decimal("0.00"))
+        t_des = sum((c["despesas"] for c in comp_data), Decimal("0.00"))
+        comp_table_data.append(["TOTAL GERAL", _brl(t_rec), _brl(t_des), _brl(t_rec - t_des)])
         
         comp_table = Table(comp_table_data, colWidths=[100, 100, 100, 100])
-        comp_table.setStyle(TableStyle([
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ("LINEBELOW", (0, 0), (-1, 0), 1, colors.grey),
-            ("LINEABOVE", (0, -1), (-1, -1), 0.5, colors.grey),
-            ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+        comp_table.setStyle(_PDF_ESTILO_COMPARATIVO)
+        comp_table.setStyle([
             ("TEXTCOLOR", (3, -1), (3, -1), colors.HexColor("#10B981") if (t_rec - t_des) >= 0 else colors.red),
-        ]))
+        ])
         elements.append(comp_table)
         elements.append(Spacer(1, 10 * mm))
 
     # =====================
     # SEÇÃO 2: INVESTIMENTOS
     # =====================
-    if escopo in ["investimentos", "completo"] and investimentos.exists():
+    # Os ativos são percorridos duas vezes (total de mercado e linhas da tabela),
+    # então a lista é materializada uma única vez em vez de consultar `.exists()` antes.
+    ativos = list(investimentos) if escopo in ["investimentos", "completo"] else []
+    if ativos:
         elements.append(PageBreak())
         section_invest = Paragraph("Carteira de Investimentos", section_style)
         elements.append(section_invest)
 
         # Gráfico de Alocação
         elements.append(Paragraph("Alocação por Classe de Ativo", styles["Normal"]))
-        aloc_dados = get_alocacao_data(usuario, data_fim)
+        aloc_dados = _alocacao_por_classe(ativos)
         grafico = render_grafico_alocacao(aloc_dados)
         if grafico:
             elements.append(grafico)
             elements.append(Spacer(1, 5 * mm))
 
         invest_data = [["Ticker", "Classe", "Qtd", "PM", "Mercado", "Meta (%)", "Ideal", "Lucro/P"]]
-        total_mer = sum(a.valor_total_atual for a in investimentos)
+        total_mer = sum(_centavos(_valor_mercado(a)) for a in ativos) / 100
 
-        for ativo in investimentos:
-            vm = ativo.valor_total_atual
+        for ativo in ativos:
+            vm = _valor_mercado(ativo)
             meta = ativo.meta_porcentagem
-            val_ideal = (meta / 100) * total_mer if total_mer > 0 else 0
+            val_ideal = float(meta) / 100 * total_mer if total_mer > 0 else 0
             classe = ativo.subcategoria.categoria.classe.nome if ativo.subcategoria else ""
             invest_data.append([
                 ativo.ticker, 
                 classe[:10], 
-                f"{ativo.quantidade:,.2f}", 
-                f"R$ {ativo.preco_medio:,.2f}", 
-                f"R$ {vm:,.2f}", 
-                f"{meta:,.2f}%",
-                f"R$ {val_ideal:,.2f}",
-                f"R$ {vm - ativo.valor_investido:,.2f}"
+                _num(ativo.quantidade), 
+                _brl(ativo.preco_medio), 
+                _brl(vm), 
+                _num(meta) + "%",
+                _brl(val_ideal),
+                _brl(vm - ativo.valor_investido)
             ])
 
         # Ajuste de larguras: total ~520 pontos para caber no A4
         table_inv = Table(invest_data, colWidths=[55, 65, 55, 75, 80, 50, 80, 80])
-        table_inv.setStyle(TableStyle([
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#3B82F6")),
-            ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
-            ("FONTSIZE", (0, 0), (-1, -1), 7),  # Fonte levemente menor para caber tudo
-        ]))
+        table_inv.setStyle(_PDF_ESTILO_CARTEIRA)
         elements.append(table_inv)
         elements.append(Spacer(1, 10 * mm))
 
         # Novo: Resumo de Proventos
         elements.append(Paragraph("Proventos Recebidos no Período", section_style))
         prov_dados = get_proventos_data(usuario, data_inicio, data_fim)
-        if prov_dados.exists():
-            prov_table_data = [["Ticker", "Total Recebido"]]
-            for p in prov_dados:
-                prov_table_data.append([p["ativo__ticker"], f"R$ {p['total']:,.2f}"])
-            
+        prov_table_data = [["Ticker", "Total Recebido"]]
+        for p in prov_dados:
+            prov_table_data.append([p["ativo__ticker"], _brl(p["total"])])
+
+        if len(prov_table_data) > 1:
             table_prov = Table(prov_table_data, colWidths=[100, 150])
-            table_prov.setStyle(TableStyle([
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#8B5CF6")),
-                ("ALIGN", (1, 1), (1, -1), "RIGHT"),
-            ]))
+            table_prov.setStyle(_PDF_ESTILO_PROVENTOS)
             elements.append(table_prov)
         else:
             elements.append(Paragraph("Nenhum provento recebido no período.", styles["Normal"]))
@@ -608,23 +953,23 @@ def gerar_pdf(usuario, data_inicio: date, data_fim: date, escopo: str = "complet
         elements.append(Spacer(1, 10 * mm))
 
         # Transações de Investimento
-        if transacoes_invest.exists():
+        tr_data = []
+        for t in transacoes_invest.iterator(chunk_size=2000):
+            tr_data.append([t.data.strftime("%d/%m/%Y"), t.ativo.ticker, _TIPO_TRANSACAO_LABEL.get(t.tipo, "")[:10],
+                            _num(t.quantidade), _brl(t.preco_unitario), _brl(t.valor_total)])
+
+        if tr_data:
             elements.append(Paragraph("Transactions Tracking", section_style))
-            tr_data = [["Data", "Ticker", "Tipo", "Qtd", "Preço", "Total"]]
-            for t in transacoes_invest:
-                tr_data.append([t.data.strftime("%d/%m/%Y"), t.ativo.ticker, t.get_tipo_display()[:10], 
-                                f"{t.quantidade:,.2f}", f"R$ {t.preco_unitario:,.2f}", f"R$ {t.valor_total:,.2f}"])
-            
-            table_tr = Table(tr_data, colWidths=[60, 70, 90, 80, 100, 100])
-            table_tr.setStyle(TableStyle([
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("LINEBELOW", (0, 0), (-1, 0), 1, colors.HexColor("#8B5CF6")),
-                ("ALIGN", (3, 1), (-1, -1), "RIGHT"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-            ]))
-            elements.append(table_tr)
+            elements.extend(_tabelas_em_blocos(
+                ["Data", "Ticker", "Tipo", "Qtd", "Preço", "Total"],
+                tr_data,
+                [60, 70, 90, 80, 100, 100],
+                _PDF_ESTILO_TRANSACOES,
+            ))
 
     # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer.getvalue()
+    pdf = canvas.Canvas(destino, pagesize=A4)
+    pdf.setTitle(f"Relatório Financeiro {data_inicio.strftime('%d-%m-%Y')} a {data_fim.strftime('%d-%m-%Y')}")
+    pdf.setAuthor("FreeCash")
+    _desenhar_paginas(pdf, elements)
+    pdf.save()
@@ -6,14 +6,118 @@ de data, descrição de despesas/receitas, valor monetário e tipo (Crédito/Dé
 para fins de conciliação.
 """
 
+import functools
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from typing import List, Dict, Any
 import pdfplumber
 
+# Expressões regulares compiladas uma única vez, reaproveitadas em todas as linhas dos PDFs
+
+# Padrão de valor monetário
+_VALOR_PATTERN = r"R?\$?\s*(-?\d{1,3}(?:\.\d{3})*,\d{2})"
+_VALOR_RE = re.compile(_VALOR_PATTERN)
+
+# Linha de extrato genérico: datas (DD/MM/YYYY, DD/MM/YY ou DD-MM-YYYY) e valores
+# monetários localizados em uma única varredura
+_LINHA_RE = re.compile(
+    r"(?P<data>\d{2}/\d{2}/\d{4}|\d{2}/\d{2}/\d{2}|\d{2}-\d{2}-\d{4})|(?P<valor>" + _VALOR_PATTERN + ")"
+)
+_DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y")
+# Prefixo "R$ " que o padrão de valor absorve quando a data entre eles é removida
+_PREFIXO_VALOR_RE = re.compile(r"R?\$?\s*$")
+
+# Nubank usa formato: DD MMM - Descrição - Valor
+_NUBANK_DATE_RE = re.compile(r"(\d{2}\s+\w{3})", re.IGNORECASE)
+
+# Layout de colunas: data DD/MM, descrição e valor monetário R$ X.XXX,XX
+_LINHA_COLUNAS_RE = re.compile(
+    r"(?:\d+\s+)?(\d{2}/\d{2})\s+(.+?)\s+(?:R\$\s*)?(\d{1,3}(?:\.\d{3})*,\d{2})"
+)
+_VENCIMENTO_RE = re.compile(r"Vencimento\s+(\d{2}/\d{2}/(\d{4}))")
+
+# Remove separadores e sinal de "-1.234,56", deixando só os dígitos dos centavos
+_SO_DIGITOS = str.maketrans("", "", ".,-")
+
+_MESES = {
+    "jan": 1,
+    "fev": 2,
+    "mar": 3,
+    "abr": 4,
+    "mai": 5,
+    "jun": 6,
+    "jul": 7,
+    "ago": 8,
+    "set": 9,
+    "out": 10,
+    "nov": 11,
+    "dez": 12,
+}
+# Meses também nas grafias em maiúsculas ("MAI") e capitalizadas ("Mai") em que
+# aparecem nos PDFs, para que a maioria das linhas dispense a conversão de caixa
+_MESES_GRAFIAS = {
+    grafia: numero
+    for nome, numero in _MESES.items()
+    for grafia in (nome, nome.upper(), nome.capitalize())
+}
+
+
+def _valor_decimal(valor_str: str) -> Decimal:
+    """Converte um valor no formato brasileiro capturado pelas regex em Decimal positivo.
+
+    As regex garantem o formato `d{1,3}(.ddd)*,dd`, então os dígitos restantes são
+    o valor em centavos, deslocado duas casas sem passar pelo parser de strings.
 
-def parse_pdf_generico(pdf_path: str) -> List[Dict[str, Any]]:
+    Args:
+        valor_str (str): Valor como aparece no extrato (ex: '-1.234,56').
+
+    Returns:
+        Decimal: Valor absoluto com duas casas (ex: Decimal('1234.56')).
+    """
+    return Decimal(int(valor_str.translate(_SO_DIGITOS))).scaleb(-2)
+
+
+@functools.lru_cache(maxsize=4096)
+def _data_extrato(date_str: str) -> date | None:
+    """Converte a data capturada por `_LINHA_RE` testando os formatos conhecidos.
+
+    Um extrato repete a mesma data em várias linhas, e cada formato que não casa
+    custa um `strptime` e uma exceção; o cache (limitado, com chaves curtas)
+    resolve cada data distinta uma única vez por processo.
+
+    Args:
+        date_str (str): Data como aparece na linha (ex: '05/03/2024', '05/03/24').
+
+    Returns:
+        date | None: A data convertida, ou None se nenhum formato for válido.
+    """
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _textos_paginas(pdf_path: str) -> List[str]:
+    """Extrai o texto de cada página do PDF uma única vez.
+
+    O `extract_text` do pdfplumber é a etapa mais cara da leitura; com os textos em
+    mãos, a cascata de parsers de `processar_pdf` não precisa reabrir o arquivo.
+
+    Args:
+        pdf_path (str | file-like): Caminho do arquivo PDF no disco ou o próprio
+            arquivo binário já aberto (ex: upload recebido pela view).
+
+    Returns:
+        List[str]: Texto de cada página, na ordem, com "" para páginas sem texto.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def parse_pdf_generico(pdf_path: str, textos: List[str] | None = None) -> List[Dict[str, Any]]:
     """Parser genérico de fallback para extratos bancários simples.
 
     Realiza uma varredura sequencial linha a linha no texto do arquivo PDF
@@ -22,38 +126,26 @@ def parse_pdf_generico(pdf_path: str) -> List[Dict[str, Any]]:
 
     Args:
         pdf_path (str): Caminho absoluto ou relativo do arquivo PDF no disco.
+        textos (List[str] | None, optional): Textos das páginas já extraídos por
+            `_textos_paginas`. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: Lista contendo dicionários estruturados de transações,
         onde cada um possui as chaves: 'data' (date), 'descricao' (str), 'valor' (Decimal) e 'tipo' (str).
     """
     linhas = []
+    append = linhas.append
 
-    # Padrões comuns de data
-    date_patterns = [
-        r"(\d{2}/\d{2}/\d{4})",  # DD/MM/YYYY
-        r"(\d{2}/\d{2}/\d{2})",  # DD/MM/YY
-        r"(\d{2}-\d{2}-\d{4})",  # DD-MM-YYYY
-    ]
-
-    # Padrão de valor monetário
-    valor_pattern = r"R?\$?\s*(-?\d{1,3}(?:\.\d{3})*,\d{2})"
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
-                continue
-
-            for line in text.split("\n"):
-                linha_data = _extrair_linha(line, date_patterns, valor_pattern)
-                if linha_data:
-                    linhas.append(linha_data)
+    for text in textos if textos is not None else _textos_paginas(pdf_path):
+        for line in text.split("\n"):
+            linha_data = _extrair_linha(line)
+            if linha_data:
+                append(linha_data)
 
     return linhas
 
 
-def parse_pdf_nubank(pdf_path: str) -> List[Dict[str, Any]]:
+def parse_pdf_nubank(pdf_path: str, textos: List[str] | None = None) -> List[Dict[str, Any]]:
     """Parser altamente especializado no padrão de faturas e extratos em PDF do Nubank.
 
     Nubank usa a sintaxe característica de data abreviada sem ano (ex: '20 MAI')
@@ -61,135 +153,124 @@ def parse_pdf_nubank(pdf_path: str) -> List[Dict[str, Any]]:
 
     Args:
         pdf_path (str): Caminho para o extrato em formato PDF.
+        textos (List[str] | None, optional): Textos das páginas já extraídos por
+            `_textos_paginas`. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: Lista de dicionários de transações decodificadas.
     """
     linhas = []
-
-    # Nubank usa formato: DD MMM - Descrição - Valor
-    date_pattern = r"(\d{2}\s+\w{3})"
-    valor_pattern = r"R?\$?\s*(-?\d{1,3}(?:\.\d{3})*,\d{2})"
-
-    meses = {
-        "jan": 1,
-        "fev": 2,
-        "mar": 3,
-        "abr": 4,
-        "mai": 5,
-        "jun": 6,
-        "jul": 7,
-        "ago": 8,
-        "set": 9,
-        "out": 10,
-        "nov": 11,
-        "dez": 12,
-    }
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
+    # Ano corrente e métodos usados em toda linha resolvidos uma vez, fora do laço
+    ano = datetime.now().year
+    date_search = _NUBANK_DATE_RE.search
+    valor_search = _VALOR_RE.search
+    date_sub = _NUBANK_DATE_RE.sub
+    valor_sub = _VALOR_RE.sub
+    meses_get = _MESES_GRAFIAS.get
+
+    for text in textos if textos is not None else _textos_paginas(pdf_path):
+        for line in text.split("\n"):
+            # Sem vírgula não há valor monetário: descarta sem rodar as regex
+            if "," not in line:
                 continue
 
-            for line in text.split("\n"):
-                # Tenta extrair data no formato Nubank
-                date_match = re.search(date_pattern, line, re.IGNORECASE)
-                valor_match = re.search(valor_pattern, line)
-
-                if date_match and valor_match:
-                    try:
-                        # Parse da data
-                        date_str = date_match.group(1)
-                        parts = date_str.split()
-                        dia = int(parts[0])
-                        mes_nome = parts[1].lower()[:3]
-                        mes = meses.get(mes_nome, 1)
-                        ano = datetime.now().year
-                        data = datetime(ano, mes, dia).date()
-
-                        # Parse do valor
-                        valor_str = valor_match.group(1)
-                        valor_str = valor_str.replace(".", "").replace(",", ".")
-                        valor = abs(Decimal(valor_str))
-
-                        # Descrição
-                        descricao = line
-                        descricao = re.sub(date_pattern, "", descricao)
-                        descricao = re.sub(valor_pattern, "", descricao)
-                        descricao = descricao.strip(" -")
-
-                        # Tipo
-                        is_negativo = valor_match.group(1).startswith("-")
-                        tipo = "D" if is_negativo else "C"
-
-                        if descricao and valor > 0:
-                            linhas.append(
-                                {
-                                    "data": data,
-                                    "descricao": descricao[:500],
-                                    "valor": valor,
-                                    "tipo": tipo,
-                                }
-                            )
-                    except (ValueError, IndexError):
-                        continue
+            # Tenta extrair data no formato Nubank
+            date_match = date_search(line)
+            valor_match = valor_search(line)
+
+            if date_match and valor_match:
+                try:
+                    # Parse da data
+                    date_str = date_match.group(1)
+                    parts = date_str.split()
+                    dia = int(parts[0])
+                    # O padrão captura exatamente 3 letras para o mês
+                    mes_nome = parts[1]
+                    mes = meses_get(mes_nome) or meses_get(mes_nome.lower(), 1)
+                    data = datetime(ano, mes, dia).date()
+
+                    # Parse do valor
+                    valor = _valor_decimal(valor_match.group(1))
+
+                    # Descrição
+                    descricao = line
+                    descricao = date_sub("", descricao)
+                    descricao = valor_sub("", descricao)
+                    descricao = descricao.strip(" -")
+
+                    # Tipo
+                    is_negativo = valor_match.group(1).startswith("-")
+                    tipo = "D" if is_negativo else "C"
+
+                    if descricao and valor > 0:
+                        linhas.append(
+                            {
+                                "data": data,
+                                "descricao": descricao[:500],
+                                "valor": valor,
+                                "tipo": tipo,
+                            }
+                        )
+                except (ValueError, IndexError):
+                    continue
 
     return linhas
 
 
-def _extrair_linha(
-    line: str, date_patterns: list, valor_pattern: str
-) -> Dict[str, Any] | None:
+def _extrair_linha(line: str) -> Dict[str, Any] | None:
     """Extrai informações estruturadas de uma única linha de texto bruto de extrato.
 
     Args:
         line (str): A string da linha extraída do PDF.
-        date_patterns (list): Lista de expressões regulares de padrões de data.
-        valor_pattern (str): Expressão regular do padrão monetário.
 
     Returns:
         Dict[str, Any] | None: Transação estruturada ou None caso a linha não corresponda aos padrões mínimos.
     """
-    data = None
-
-    # Tentar encontrar data
-    for pattern in date_patterns:
-        match = re.search(pattern, line)
-        if match:
-            date_str = match.group(1)
-            # Tenta diferentes formatos
-            for fmt in ["%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y"]:
-                try:
-                    data = datetime.strptime(date_str, fmt).date()
-                    break
-                except ValueError:
-                    continue
-            break
+    # Filtro barato antes das regex: toda transação tem um valor com vírgula e uma
+    # data com "/" ou "-", o que descarta cabeçalhos e linhas em branco de cara
+    if "," not in line or ("/" not in line and "-" not in line):
+        return None
 
-    if not data:
+    # Uma varredura localiza a primeira data, o primeiro valor e os trechos de texto
+    # entre as ocorrências, que formam a descrição
+    date_str = valor_str = None
+    trechos = []
+    inicio = 0
+    anterior_data = False
+    for match in _LINHA_RE.finditer(line):
+        trecho = line[inicio:match.start()]
+        if match.group("data"):
+            if date_str is None:
+                date_str = match.group("data")
+            anterior_data = True
+        else:
+            if valor_str is None:
+                valor_str = match.group(3)
+            # Valor colado a uma data: o espaço e o "R$" antes da data também saem
+            # da descrição, como se a data já tivesse sido removida
+            if anterior_data and not trecho:
+                trechos[-1] = _PREFIXO_VALOR_RE.sub("", trechos[-1])
+            anterior_data = False
+        trechos.append(trecho)
+        inicio = match.end()
+
+    if date_str is None or valor_str is None:
         return None
 
-    # Tentar encontrar valor
-    valor_match = re.search(valor_pattern, line)
-    if not valor_match:
+    data = _data_extrato(date_str)
+    if not data:
         return None
 
     try:
-        valor_str = valor_match.group(1)
         is_negativo = valor_str.startswith("-")
-        valor_str = valor_str.replace(".", "").replace(",", ".").replace("-", "")
-        valor = Decimal(valor_str)
+        valor = _valor_decimal(valor_str)
 
         if valor <= 0:
             return None
 
         # Limpar descrição
-        descricao = line
-        for pattern in date_patterns:
-            descricao = re.sub(pattern, "", descricao)
-        descricao = re.sub(valor_pattern, "", descricao)
-        descricao = descricao.strip(" -|")
+        trechos.append(line[inicio:])
+        descricao = "".join(trechos).strip(" -|")
 
         if not descricao or len(descricao) < 3:
             return None
@@ -206,7 +287,7 @@ def _extrair_linha(
         return None
 
 
-def parse_layout_colunas(pdf_path: str) -> List[Dict[str, Any]]:
+def parse_layout_colunas(pdf_path: str, textos: List[str] | None = None) -> List[Dict[str, Any]]:
     """Parser avançado para extratos com layout de colunas tabulares (ex: Santander).
 
     Procura por linhas estruturadas na ordem clássica contendo data (DD/MM),
@@ -215,73 +296,72 @@ def parse_layout_colunas(pdf_path: str) -> List[Dict[str, Any]]:
 
     Args:
         pdf_path (str): Caminho para o extrato em formato PDF.
+        textos (List[str] | None, optional): Textos das páginas já extraídos por
+            `_textos_paginas`. Defaults to None.
 
     Returns:
         List[Dict[str, Any]]: Lista de dicionários de transações.
     """
     linhas = []
-
-    # Regex para capturar data DD/MM e valor monetário R$ X.XXX,XX
-    line_pattern = (
-        r"(?:\d+\s+)?(\d{2}/\d{2})\s+(.+?)\s+(?:R\$\s*)?(\d{1,3}(?:\.\d{3})*,\d{2})"
-    )
-
-    with pdfplumber.open(pdf_path) as pdf:
-        # Tenta achar ano de vencimento na primeira página
-        ano_fatura = datetime.now().year
-        first_page_text = pdf.pages[0].extract_text()
-        if first_page_text:
-            vencimento_match = re.search(
-                r"Vencimento\s+(\d{2}/\d{2}/(\d{4}))", first_page_text
-            )
-            if vencimento_match:
-                ano_fatura = int(vencimento_match.group(2))
-
-        for page in pdf.pages:
-            text = page.extract_text()
-            if not text:
+    line_search = _LINHA_COLUNAS_RE.search
+    # Datas além deste limite são de compras do ano anterior ao da fatura
+    limite_futuro = datetime.now().date() + timedelta(days=30)
+
+    if textos is None:
+        textos = _textos_paginas(pdf_path)
+
+    # Tenta achar ano de vencimento na primeira página
+    ano_fatura = datetime.now().year
+    first_page_text = textos[0]
+    if first_page_text:
+        vencimento_match = _VENCIMENTO_RE.search(first_page_text)
+        if vencimento_match:
+            ano_fatura = int(vencimento_match.group(2))
+
+    for text in textos:
+        for line in text.split("\n"):
+            # Sem "/" da data ou "," do valor a linha não casa: descarta antes da
+            # regex, cuja descrição não-gulosa é cara em linhas longas sem match
+            if "," not in line or "/" not in line:
                 continue
+            match = line_search(line)
+            if match:
+                try:
+                    data_str = match.group(1)
+                    descricao_raw = match.group(2)
+                    valor_str = match.group(3)
+
+                    # Limpa descrição
+                    descricao = descricao_raw.strip()
+
+                    # Parse Valor
+                    valor = _valor_decimal(valor_str)
+
+                    # Parse Data
+                    dia, mes = map(int, data_str.split("/"))
+
+                    # Lógica de Ano:
+                    ano_compra = ano_fatura
+
+                    # Simplificação segura:
+                    data = datetime(ano_compra, mes, dia).date()
+
+                    # Se a data ficar no futuro em relação ao processamento
+                    if data > limite_futuro:
+                        data = data.replace(year=data.year - 1)
+
+                    linhas.append(
+                        {
+                            "data": data,
+                            "descricao": descricao[:500],
+                            "valor": valor,
+                            "tipo": "D",  # Fatura de cartão é sempre débito/despesa
+                        }
+                    )
+                except (ValueError, InvalidOperation):
+                    continue
 
-            for line in text.split("\n"):
-                match = re.search(line_pattern, line)
-                if match:
-                    try:
-                        data_str = match.group(1)
-                        descricao_raw = match.group(2)
-                        valor_str = match.group(3)
-
-                        # Limpa descrição
-                        descricao = descricao_raw.strip()
-
-                        # Parse Valor
-                        valor_str_clean = valor_str.replace(".", "").replace(",", ".")
-                        valor = Decimal(valor_str_clean)
-
-                        # Parse Data
-                        dia, mes = map(int, data_str.split("/"))
-
-                        # Lógica de Ano:
-                        ano_compra = ano_fatura
-
-                        # Simplificação segura:
-                        data = datetime(ano_compra, mes, dia).date()
-
-                        # Se a data ficar no futuro em relação ao processamento
-                        if data > datetime.now().date() + timedelta(days=30):
-                            data = data.replace(year=data.year - 1)
-
-                        linhas.append(
-                            {
-                                "data": data,
-                                "descricao": descricao[:500],
-                                "valor": valor,
-                                "tipo": "D",  # Fatura de cartão é sempre débito/despesa
-                            }
-                        )
-                    except (ValueError, InvalidOperation):
-                        continue
-
-    return list(linhas)
+    return linhas
 
 
 def processar_pdf(pdf_path: str, banco: str = "generico") -> List[Dict[str, Any]]:
@@ -292,7 +372,8 @@ def processar_pdf(pdf_path: str, banco: str = "generico") -> List[Dict[str, Any]
     e o parser do Nubank para garantir a maior taxa de sucesso de leitura possível.
 
     Args:
-        pdf_path (str): Caminho físico do arquivo no servidor.
+        pdf_path (str | file-like): Caminho físico do arquivo no servidor ou o
+            arquivo binário já aberto, repassado ao `pdfplumber.open`.
         banco (str, optional): Instituição de origem ('nubank', 'santander', 'generico'). Defaults to "generico".
 
     Returns:
@@ -305,19 +386,22 @@ def processar_pdf(pdf_path: str, banco: str = "generico") -> List[Dict[str, Any]
     }
 
     if banco == "generico":
-        # Estratégia de Fallback: Tenta um por um até achar linhas
+        # Estratégia de Fallback: Tenta um por um até achar linhas, extraindo o
+        # texto das páginas uma única vez para os três parsers
+        textos = _textos_paginas(pdf_path)
+
         # 1. Tenta parser genérico
-        linhas = parse_pdf_generico(pdf_path)
+        linhas = parse_pdf_generico(pdf_path, textos)
         if linhas:
             return linhas
 
         # 2. Tenta parser de colunas
-        linhas = parse_layout_colunas(pdf_path)
+        linhas = parse_layout_colunas(pdf_path, textos)
         if linhas:
             return linhas
 
         # 3. Tenta Nubank
-        linhas = parse_pdf_nubank(pdf_path)
+        linhas = parse_pdf_nubank(pdf_path, textos)
         return linhas
 
     parser = parsers.get(banco, parse_pdf_generico)
@@ -8,6 +8,7 @@ pagamentos e estornos das compras parceladas e individuais do cartão de crédit
 from datetime import date
 from decimal import Decimal
 import calendar
+import functools
 import logging
 
 from django.db import transaction
@@ -317,6 +318,16 @@ def despesa_pode_ser_editada(despesa: Conta) -> bool:
     return True
 
 
+@functools.lru_cache(maxsize=None)
+def _dias_no_mes(ano: int, mes: int) -> int:
+    """Quantidade de dias do mês, memoizada por (ano, mês).
+
+    Os lançamentos de uma importação ou série recorrente caem em poucos meses,
+    então o cache evita repetir `calendar.monthrange` a cada linha.
+    """
+    return calendar.monthrange(ano, mes)[1]
+
+
 def add_months(d: date, months: int) -> date:
     """Adiciona um número inteiro de meses a uma data com tratamento de dias de fim de mês.
 
@@ -331,11 +342,12 @@ def add_months(d: date, months: int) -> date:
     """
     y = d.year + (d.month - 1 + months) // 12
     m = (d.month - 1 + months) % 12 + 1
-    last_day = calendar.monthrange(y, m)[1]
+    last_day = _dias_no_mes(y, m)
     day = min(d.day, last_day)
     return date(y, m, day)
 
 
+@functools.lru_cache(maxsize=4096)
 def calcular_vencimento_fatura(
     data_compra: date, dia_fechamento: int, dia_vencimento: int
 ) -> date:
@@ -351,6 +363,10 @@ def calcular_vencimento_fatura(
 
     Returns:
         date: A data de vencimento da fatura na qual esta despesa será cobrada.
+
+    Note:
+        Função pura e memoizada: extratos e lotes repetem as mesmas datas de
+        compra para o mesmo cartão, e o resultado só depende dos argumentos.
     """
     ano = data_compra.year
     mes = data_compra.month
@@ -378,7 +394,7 @@ def calcular_vencimento_fatura(
             mes_vencimento = mes_fechamento + 1
             ano_vencimento = ano_fechamento
 
-    ultimo_dia_mes = calendar.monthrange(ano_vencimento, mes_vencimento)[1]
+    ultimo_dia_mes = _dias_no_mes(ano_vencimento, mes_vencimento)
     dia_venc = min(dia_vencimento, ultimo_dia_mes)
 
     return date(ano_vencimento, mes_vencimento, dia_venc)
@@ -1,32 +1,65 @@
 """Serviço de Descriptografia e Restauração de Backups (.fcbk Importer).
 
 Este módulo processa arquivos de backup importados no formato '.fcbk', realizando a
-autenticação da senha via derivação de chaves PBKDF2, descriptografia simétrica
+autenticação da senha via derivação de chaves (scrypt, ou PBKDF2 nos backups
+anteriores à versão 4.2), descriptografia simétrica
 AES-GCM, verificação de integridade digital SHA256 e gravação transacional atômica
 de todas as entidades financeiras na base PostgreSQL (multi-tenant por usuário).
 """
 
 from __future__ import annotations
 
-import json
 import os
 import base64
+import functools
 import hashlib
+import hmac
 import uuid
 import io
 import logging
+import threading
 import zlib
+from collections import OrderedDict
+import orjson
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.apps import apps
+from django.db.models import CASCADE, DO_NOTHING, SET_NULL, DateField, DateTimeField
+from django.db.models.signals import post_delete, pre_delete
 from django.db.models.fields.related import ForeignKey, OneToOneField
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 logger = logging.getLogger(__name__)
 
-SUPPORTED_VERSIONS = {"4.0", "4.1"}
+SUPPORTED_VERSIONS = {"4.0", "4.1", "4.2"}
+
+# Cabeçalho gravado pelo export a partir da versão 4.2 (ver export_service):
+# assinatura + identificador da KDF. Sem ele, o payload começa no salt (PBKDF2).
+_ASSINATURA_KDF = b"FCBK"
+_KDF_PBKDF2 = 0
+_KDF_SCRYPT = 1
+_SCRYPT_N = 2 ** 15
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+# Os modelos do backup são gravados em lote (bulk_create) na restauração. Ficam de
+# fora os que dependem da lógica do próprio save(): Conta sincroniza o estado das
+# compras com a fatura do período e Ativo normaliza o CNPJ
+_MODELOS_REGISTRO_A_REGISTRO = frozenset({"core.Conta", "investimento.Ativo"})
+_LOTE_RESTAURACAO = settings.FREECASH_BULK_BATCH_SIZE
+
+# Cifras AES-GCM das chaves já derivadas neste processo, indexadas por (KDF, salt,
+# HMAC da senha). O HMAC usa um segredo aleatório do processo, então nem a senha
+# nem um hash rápido dela (que facilitaria força bruta) ficam guardados na memória.
+_CHAVES_DERIVADAS: OrderedDict[tuple[int, bytes, bytes], AESGCM] = OrderedDict()
+_MAX_CHAVES_DERIVADAS = 8
+_SEGREDO_CACHE_CHAVES = os.urandom(32)
+_LOCK_CHAVES = threading.Lock()
 
 
 # =========================================================
@@ -34,8 +67,50 @@ SUPPORTED_VERSIONS = {"4.0", "4.1"}
 # =========================================================
 
 
+def _cifra_do_backup(salt: bytes, password: str, kdf: int = _KDF_PBKDF2) -> AESGCM:
+    """Deriva a chave AES do backup (scrypt, ou PBKDF2-HMAC-SHA256 nos arquivos legados).
+
+    A derivação é propositalmente cara. Reimportar o mesmo arquivo com a mesma
+    senha no mesmo processo (nova tentativa após uma falha na restauração, por
+    exemplo) reaproveita a cifra AES-GCM já montada com a chave, sem derivá-la nem
+    preparar o contexto do OpenSSL de novo. Em troca, até
+    `_MAX_CHAVES_DERIVADAS` chaves ficam em memória até o processo reiniciar.
+    Cada senha nova paga a derivação completa, então o cache não barateia
+    tentativas de força bruta.
+
+    Args:
+        salt (bytes): Salt de 16 bytes lido do arquivo.
+        password (str): Senha do backup informada pelo usuário.
+        kdf (int, optional): `_KDF_SCRYPT` ou `_KDF_PBKDF2` (legado). Defaults to `_KDF_PBKDF2`.
+
+    Returns:
+        AESGCM: Cifra com a chave AES de 32 bytes.
+    """
+    senha = password.encode("utf-8")
+    cache_key = (kdf, salt, hmac.new(_SEGREDO_CACHE_CHAVES, senha, hashlib.sha256).digest())
+    with _LOCK_CHAVES:
+        aesgcm = _CHAVES_DERIVADAS.get(cache_key)
+        if aesgcm is not None:
+            _CHAVES_DERIVADAS.move_to_end(cache_key)
+            return aesgcm
+
+    if kdf == _KDF_SCRYPT:
+        derivador = Scrypt(salt=salt, length=32, n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P)
+    else:
+        derivador = PBKDF2HMAC(
+            algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000
+        )
+    aesgcm = AESGCM(derivador.derive(senha))
+
+    with _LOCK_CHAVES:
+        _CHAVES_DERIVADAS[cache_key] = aesgcm
+        if len(_CHAVES_DERIVADAS) > _MAX_CHAVES_DERIVADAS:
+            _CHAVES_DERIVADAS.popitem(last=False)
+    return aesgcm
+
+
 def decrypt_data_fcbk(encrypted_base64: str, password: str) -> dict:
-    """Descriptografa arquivos de backup no formato '.fcbk' utilizando senha e PBKDF2.
+    """Descriptografa arquivos de backup no formato '.fcbk' utilizando a senha.
 
     Realiza a validação do hash SHA256 no início do arquivo para detectar violações,
     extrai os blocos de Salt/Nonce e descriptografa via AES-GCM, convertendo o
@@ -53,29 +128,39 @@ def decrypt_data_fcbk(encrypted_base64: str, password: str) -> dict:
     """
     try:
         raw_data = base64.b64decode(encrypted_base64)
-        stored_hash = raw_data[:32]
-        payload = raw_data[32:]
-
-        if hashlib.sha256(payload).digest() != stored_hash:
+        # Hash, salt e texto cifrado são lidos como fatias de memoryview sobre o
+        # mesmo buffer, sem copiar o backup inteiro a cada fatia
+        buffer = memoryview(raw_data)
+        stored_hash = bytes(buffer[:32])
+        payload = buffer[32:]
+
+        # O hashlib já usa o SHA-256 do OpenSSL (com SHA-NI quando disponível) e
+        # lê direto da memoryview, sem cópia; a comparação é em tempo constante
+        if not hmac.compare_digest(hashlib.sha256(payload).digest(), stored_hash):
             raise ValueError("O arquivo foi VIOLADO.")
 
-        salt = payload[:16]
-        nonce = payload[16:28]
-        ciphertext = payload[28:]
+        # Backups 4.2+ trazem assinatura + KDF antes do salt; os anteriores, não
+        kdf = _KDF_PBKDF2
+        if payload[:4] == _ASSINATURA_KDF and payload[4] == _KDF_SCRYPT:
+            kdf = _KDF_SCRYPT
+            payload = payload[5:]
 
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000
-        )
-        key = kdf.derive(password.encode("utf-8"))
+        salt = bytes(payload[:16])
+        nonce = bytes(payload[16:28])
+        ciphertext = payload[28:]
 
-        aesgcm = AESGCM(key)
+        aesgcm = _cifra_do_backup(salt, password, kdf)
         decrypted_data = aesgcm.decrypt(nonce, ciphertext, None)
+        # O conteúdo cifrado não é mais necessário: libera antes de montar o dicionário
+        del ciphertext, payload, buffer, raw_data
         try:
             decrypted_data = zlib.decompress(decrypted_data)
         except zlib.error:
             pass  # backup gerado antes da versão 4.1, sem compressão
 
-        data_dict = json.loads(decrypted_data.decode("utf-8"))
+        # Mesmo parser compilado da exportação: lê os bytes UTF-8 direto, sem a
+        # cópia em str e sem o custo do json da biblioteca padrão
+        data_dict = orjson.loads(decrypted_data)
     except Exception as e:
         if "VIOLADO" in str(e):
             raise e
@@ -90,23 +175,23 @@ def decrypt_data_fcbk(encrypted_base64: str, password: str) -> dict:
     return data_dict
 
 
+@functools.lru_cache(maxsize=1)
 def get_backupable_models():
     """Descobre e ordena todos os modelos locais elegíveis para restauração.
 
     Garante que os dados sejam restaurados na ordem correta de dependência de chaves
-    estrangeiras, prevenindo falhas de integridade referencial.
+    estrangeiras, prevenindo falhas de integridade referencial. O resultado é
+    memoizado, já que os modelos registrados não mudam durante o processo.
 
     Returns:
-        list[Model]: Lista de classes de Modelos Django elegíveis para restore.
+        tuple[Model]: Tupla de classes de Modelos Django elegíveis para restore.
     """
-    from django.conf import settings
-
-    project_root = str(settings.BASE_DIR)
+    project_root = os.path.abspath(settings.BASE_DIR)
     backup_models = []
 
     for app_config in apps.get_app_configs():
         app_path = os.path.abspath(app_config.path)
-        if app_path.startswith(os.path.abspath(project_root)):
+        if app_path.startswith(project_root):
             for model in app_config.get_models():
                 fields = [f.name for f in model._meta.get_fields()]
                 if "usuario" in fields and "uuid" in fields:
@@ -133,7 +218,144 @@ def get_backupable_models():
     def get_priority(m):
         return priority.get(m.__name__, 100)
 
-    return sorted(backup_models, key=get_priority)
+    return tuple(sorted(backup_models, key=get_priority))
+
+
+def _apagar_em_massa(queryset) -> int:
+    """Apaga os registros com um DELETE direto, sem carregá-los na memória.
+
+    O ``delete()`` do Django carrega cada instância sempre que o modelo tem
+    relações com CASCADE ou SET_NULL, para poder propagar a remoção. Aqui o
+    efeito de cada relação é aplicado com uma consulta sobre os dependentes
+    (recursivamente no CASCADE, um UPDATE no SET_NULL) e os registros saem em
+    um único DELETE. Modelos com signals de deleção conectados ou outras regras
+    de ``on_delete`` (PROTECT, SET_DEFAULT...) seguem pelo ``delete()`` comum.
+
+    Args:
+        queryset (QuerySet): Registros a remover.
+
+    Returns:
+        int: Quantidade de registros removidos do modelo do queryset.
+    """
+    model = queryset.model
+    relacoes = model._meta.related_objects
+    if (
+        pre_delete.has_listeners(model)
+        or post_delete.has_listeners(model)
+        or model._meta.many_to_many
+        or any(
+            rel.many_to_many or rel.on_delete not in (CASCADE, SET_NULL, DO_NOTHING)
+            for rel in relacoes
+        )
+    ):
+        return queryset.delete()[0]
+
+    for rel in relacoes:
+        dependentes = rel.related_model._base_manager.filter(**{f"{rel.field.name}__in": queryset})
+        if rel.on_delete is CASCADE:
+            _apagar_em_massa(dependentes)
+        elif rel.on_delete is SET_NULL:
+            dependentes.update(**{rel.field.name: None})
+    return queryset._raw_delete(queryset.db)
+
+
+def _inserir_em_lote(model, objetos: list) -> int:
+    """Grava de uma vez registros auxiliares do backup (sem FK para o usuário).
+
+    Se o lote falhar, os registros são gravados um a um e apenas os inválidos
+    ficam de fora.
+
+    Args:
+        model (Model): Classe do modelo a restaurar.
+        objetos (list): Instâncias ainda não salvas.
+
+    Returns:
+        int: Quantidade de registros que não puderam ser gravados.
+    """
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objetos, batch_size=_LOTE_RESTAURACAO)
+        return 0
+    except Exception as exc:
+        logger.warning(
+            "Falha ao gravar %s em lote: %s — gravando registro a registro.",
+            model.__name__, exc
+        )
+
+    falhas = 0
+    for obj in objetos:
+        # Descarta a pk de um lote desfeito pelo rollback
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+        except Exception as exc:
+            logger.warning("Falha ao restaurar %s: %s", model.__name__, exc)
+            falhas += 1
+    return falhas
+
+
+def _restaurar_em_lote(model, user, registros: dict) -> tuple[dict, int]:
+    """Grava de uma vez os registros de um modelo do backup.
+
+    Os registros do usuário já foram removidos no início da restauração; um UUID
+    que ainda exista na base pertence a outra conta e, como no fallback da gravação
+    por registro, recebe um UUID novo. Se o lote falhar, os registros são gravados
+    um a um: o que ainda falhar é associado ao registro de mesmo nome já restaurado
+    (como no fallback por nome) ou, na falta dele, ignorado.
+
+    Args:
+        model (Model): Classe do modelo a restaurar.
+        user (User): Usuário dono dos registros.
+        registros (dict): Campos de cada registro, indexados pelo UUID do backup
+            (no máximo ``_LOTE_RESTAURACAO`` por chamada).
+
+    Returns:
+        tuple[dict, int]: Mapa UUID do backup → id local e quantidade de registros ignorados.
+    """
+    uids = list(registros)
+    ocupados = {
+        str(u) for u in model.objects.filter(uuid__in=uids).values_list("uuid", flat=True)
+    }
+    objetos = [
+        model(usuario=user, uuid=uuid.uuid4() if uid in ocupados else uid, **row)
+        for uid, row in registros.items()
+    ]
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objetos, batch_size=_LOTE_RESTAURACAO)
+        return {uid: obj.pk for uid, obj in zip(uids, objetos)}, 0
+    except Exception as exc:
+        logger.warning(
+            "Falha ao gravar %s em lote: %s — gravando registro a registro.",
+            model.__name__, exc
+        )
+
+    ids = {}
+    ignorados = 0
+    for uid, obj in zip(uids, objetos):
+        # Descarta a pk de um lote desfeito pelo rollback
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+            ids[uid] = obj.pk
+            continue
+        except Exception as exc:
+            nome = getattr(obj, "nome", None)
+            existente = (
+                model.objects.filter(usuario=user, nome=nome).values_list("pk", flat=True).first()
+                if nome else None
+            )
+            if existente is not None:
+                ids[uid] = existente
+                continue
+            logger.error(
+                "Falha crítica ao restaurar %s (uuid=%s): %s", model.__name__, uid, exc
+            )
+            ignorados += 1
+    return ids, ignorados
 
 
 def restore_user_data_fcbk(data_dict: dict, user) -> dict:
@@ -152,6 +374,8 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
     backup já contém as faturas consolidadas com seus próprios UUIDs, e deixar o
     signal ativo faria a restauração de uma compra de cartão criar uma fatura
     "fantasma" (UUID novo) que depois duplicaria a fatura original do backup.
+    Os signals de Categoria, que só atualizam o timestamp de configuração do
+    usuário, também ficam desligados e esse efeito é aplicado uma única vez ao final.
 
     Args:
         data_dict (dict): Dicionário contendo os dados decodificados do backup.
@@ -181,12 +405,22 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
     # restaurada, criando uma fatura consolidada nova (com UUID gerado na hora).
     # Como o backup também contém a fatura original — restaurada por
     # update_or_create(uuid=...) — o resultado é uma fatura duplicada por mês.
+    # Os de Categoria só tocam o timestamp de ConfigUsuario (2 consultas por
+    # categoria apagada ou restaurada); esse efeito é aplicado uma vez no passo 6.
     try:
-        from core.signals import monitorar_salvamento_conta, monitorar_delecao_conta
-        from core.models import Conta as ContaCore
+        from core.signals import (
+            atualizar_config,
+            monitorar_delecao_categoria,
+            monitorar_delecao_conta,
+            monitorar_salvamento_categoria,
+            monitorar_salvamento_conta,
+        )
+        from core.models import Categoria as CategoriaCore, Conta as ContaCore
 
         post_save.disconnect(monitorar_salvamento_conta, sender=ContaCore)
         post_delete.disconnect(monitorar_delecao_conta, sender=ContaCore)
+        post_save.disconnect(monitorar_salvamento_categoria, sender=CategoriaCore)
+        post_delete.disconnect(monitorar_delecao_categoria, sender=CategoriaCore)
         core_signals_disconnected = True
     except Exception as e:
         logger.warning("Não foi possível desconectar signals de fatura do core: %s", e)
@@ -200,22 +434,16 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
     ativos_restaurados = []  # rastreia ativos para recálculo posterior
 
     def get_model_field_names(model):
-        """Retorna os nomes de campos válidos do modelo."""
-        return {
+        """Retorna os nomes de campos válidos do modelo, incluindo FKs com sufixo _id."""
+        valid_fields = {
             f.name
             for f in model._meta.get_fields()
             if hasattr(f, "column") or f.name in ["id"]
         }
-
-    def filter_valid_fields(model, row):
-        """Filtra apenas campos que existem no modelo atual."""
-        valid_fields = get_model_field_names(model)
-        # Também incluir campos de FK com sufixo _id
         valid_fk_fields = {
             f"{f.name}_id" for f in model._meta.fields if isinstance(f, ForeignKey)
         }
-        all_valid = valid_fields | valid_fk_fields
-        return {k: v for k, v in row.items() if k in all_valid}
+        return valid_fields | valid_fk_fields
 
     try:
         with transaction.atomic():
@@ -228,7 +456,9 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                         break
 
                 if not is_one_to_one:
-                    deleted_count, _ = model.objects.filter(usuario=user).delete()
+                    # Com os signals desligados acima, a maioria dos modelos sai em
+                    # um DELETE direto, sem carregar o histórico do usuário
+                    deleted_count = _apagar_em_massa(model.objects.filter(usuario=user))
                     logger.debug(
                         "Removidos %d registros de %s para o usuário %s",
                         deleted_count, model.__name__, user.username
@@ -257,6 +487,37 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                     "Restaurando %d registros de %s.%s", len(records), app_label, model_name
                 )
 
+                # Esquema do modelo resolvido uma única vez, fora do laço de registros:
+                # campos de data/hora a converter, FKs a resolver por UUID e campos válidos.
+                # Campos auto_now/auto_now_add (criada_em, atualizada_em) ficam de fora:
+                # na inserção o pre_save os substitui pelo horário atual, então
+                # convertê-los em todo registro seria trabalho descartado
+                parsers_data = [
+                    (f.name, parse_datetime if isinstance(f, DateTimeField) else parse_date)
+                    for f in model._meta.fields
+                    if isinstance(f, DateField) and not (f.auto_now or f.auto_now_add)
+                ]
+                fks = [
+                    (
+                        f"{field.name}_uuid",
+                        f"{field.name}_id",
+                        f"{field.remote_field.model._meta.app_label}.{field.remote_field.model.__name__}",
+                        field.remote_field.model.__name__,
+                    )
+                    for field in model._meta.fields
+                    if isinstance(field, ForeignKey) and field.name != "usuario"
+                ]
+                campos_validos = get_model_field_names(model)
+                em_lote = (
+                    composite_key not in _MODELOS_REGISTRO_A_REGISTRO and not is_one_to_one_user
+                )
+                fks_obrigatorias = [
+                    f"{field.name}_id"
+                    for field in model._meta.fields
+                    if isinstance(field, ForeignKey) and field.name != "usuario" and not field.null
+                ]
+                lote = {}
+
                 for row in records:
                     uid = row.pop("uuid", None)
                     if not uid:
@@ -264,41 +525,44 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                         continue
 
                     # Parse date/datetime fields from string to actual python objects
-                    from django.db.models import DateField, DateTimeField
-                    from django.utils.dateparse import parse_date, parse_datetime
-
-                    for field in model._meta.fields:
-                        if field.name in row and row[field.name]:
-                            val = row[field.name]
-                            if isinstance(val, str):
-                                if isinstance(field, DateTimeField):
-                                    parsed = parse_datetime(val)
-                                    if parsed:
-                                        row[field.name] = parsed
-                                elif isinstance(field, DateField):
-                                    parsed = parse_date(val)
-                                    if parsed:
-                                        row[field.name] = parsed
+                    for nome, parser in parsers_data:
+                        val = row.get(nome)
+                        if val and isinstance(val, str):
+                            parsed = parser(val)
+                            if parsed:
+                                row[nome] = parsed
 
                     # Resolve FKs usando chave composta (app_label.ModelName)
-                    for field in model._meta.fields:
-                        if isinstance(field, ForeignKey) and field.name != "usuario":
-                            fk_uuid_key = f"{field.name}_uuid"
-                            val_uuid = row.pop(fk_uuid_key, None)
-
-                            if val_uuid:
-                                target_model = field.remote_field.model
-                                target_key = f"{target_model._meta.app_label}.{target_model.__name__}"
-                                local_id = uuid_to_id.get(target_key, {}).get(str(val_uuid))
-                                if local_id is None:
-                                    # Fallback: chave simples de nome
-                                    local_id = uuid_to_id.get(target_model.__name__, {}).get(str(val_uuid))
-                                row[f"{field.name}_id"] = local_id
-                            else:
-                                row[f"{field.name}_id"] = None
+                    for fk_uuid_key, fk_id_key, target_key, target_name in fks:
+                        val_uuid = row.pop(fk_uuid_key, None)
+
+                        if val_uuid:
+                            local_id = uuid_to_id.get(target_key, {}).get(str(val_uuid))
+                            if local_id is None:
+                                # Fallback: chave simples de nome
+                                local_id = uuid_to_id.get(target_name, {}).get(str(val_uuid))
+                            row[fk_id_key] = local_id
+                        else:
+                            row[fk_id_key] = None
 
                     # Filtrar campos que não existem mais no modelo
-                    row = filter_valid_fields(model, row)
+                    row = {k: v for k, v in row.items() if k in campos_validos}
+
+                    if em_lote:
+                        # Sem a referência obrigatória o registro não pode ser gravado
+                        if any(row.get(campo) is None for campo in fks_obrigatorias):
+                            total_ignorados += 1
+                        else:
+                            lote[str(uid)] = row
+                        # Grava a cada lote cheio, para não manter instâncias de
+                        # todo o histórico na memória ao mesmo tempo
+                        if len(lote) >= _LOTE_RESTAURACAO:
+                            ids, ignorados = _restaurar_em_lote(model, user, lote)
+                            uuid_to_id[composite_key].update(ids)
+                            total_restored += len(ids)
+                            total_ignorados += ignorados
+                            lote = {}
+                        continue
 
                     # Upsert/Create
                     obj = None
@@ -349,17 +613,25 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                         if model_name == "Ativo":
                             ativos_restaurados.append(obj)
 
+                if lote:
+                    ids, ignorados = _restaurar_em_lote(model, user, lote)
+                    uuid_to_id[composite_key].update(ids)
+                    total_restored += len(ids)
+                    total_ignorados += ignorados
+
             # 2b. Restaurar o histórico de aportes das metas
             # Não passa pelo laço genérico porque `AporteMeta` não tem FK para o
             # usuário. Os registros antigos já sumiram junto com as metas, via
-            # CASCADE, no passo de DELETE.
+            # CASCADE, no passo de DELETE. Os aportes são montados em memória e
+            # gravados em lote; um UUID repetido no arquivo fica com o último
+            # registro, como fazia o update_or_create.
             aporte_records = data_dict.get("data", {}).get("core", {}).get("AporteMeta", [])
             if aporte_records:
                 logger.debug("Restaurando %d registros de AporteMeta", len(aporte_records))
                 from core.models import AporteMeta
-                from django.utils.dateparse import parse_date
                 from decimal import Decimal as DecimalAporte
 
+                aportes = {}
                 for row in aporte_records:
                     meta_uuid = row.get("meta_uuid")
                     meta_id = uuid_to_id.get("core.MetaFinanceira", {}).get(meta_uuid)
@@ -372,31 +644,46 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
 
                     try:
                         data_aporte = parse_date(row["data"]) if row.get("data") else None
+                        aporte_uuid = str(row.get("uuid") or uuid.uuid4())
                         # `valor_acumulado` da meta já veio pronto do backup: os
                         # aportes são apenas o histórico e não devem ser somados
                         # de novo (a soma acontece só na action da API).
-                        AporteMeta.objects.update_or_create(
-                            uuid=row.get("uuid") or uuid.uuid4(),
-                            defaults={
-                                "meta_id": meta_id,
-                                "data": data_aporte or timezone.localdate(),
-                                "valor": DecimalAporte(str(row.get("valor") or 0)),
-                                "observacao": row.get("observacao") or "",
-                            },
+                        aportes[aporte_uuid] = AporteMeta(
+                            uuid=aporte_uuid,
+                            meta_id=meta_id,
+                            data=data_aporte or timezone.localdate(),
+                            valor=DecimalAporte(str(row.get("valor") or 0)),
+                            observacao=row.get("observacao") or "",
                         )
-                        total_restored += 1
                     except Exception as e:
                         logger.warning("Falha ao restaurar aporte de meta: %s", e)
                         total_ignorados += 1
 
+                # Um UUID que ainda exista na base é de um aporte de outra conta
+                ocupados = {
+                    str(u) for u in AporteMeta.objects.filter(
+                        uuid__in=list(aportes)
+                    ).values_list("uuid", flat=True)
+                }
+                for aporte_uuid in ocupados:
+                    aportes[aporte_uuid].uuid = uuid.uuid4()
+
+                falhas = _inserir_em_lote(AporteMeta, list(aportes.values()))
+                total_restored += len(aportes) - falhas
+                total_ignorados += falhas
+
             # 3. Restaurar cotações históricas se fornecidas no backup
+            # Os ativos acabaram de ser recriados, então não há cotações deles na
+            # base: as linhas são deduplicadas por (ativo, data) em memória, com a
+            # última prevalecendo, e gravadas em lote.
             cotacao_records = data_dict.get("data", {}).get("investimento", {}).get("Cotacao", [])
             if cotacao_records:
                 logger.debug("Restaurando %d registros de Cotacao", len(cotacao_records))
                 from investimento.models import Cotacao
-                from datetime import datetime
+                from datetime import date
                 from decimal import Decimal
-                
+
+                cotacoes = {}
                 for row in cotacao_records:
                     ativo_uuid = row.get("ativo_uuid")
                     ativo_id = uuid_to_id.get("investimento.Ativo", {}).get(ativo_uuid)
@@ -407,23 +694,27 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                         try:
                             data_str = row.get("data")
                             if data_str:
-                                dt = datetime.strptime(data_str, "%Y-%m-%d").date()
-                                Cotacao.objects.update_or_create(
+                                dt = date.fromisoformat(data_str)
+                                cotacoes[(ativo_id, dt)] = Cotacao(
                                     ativo_id=ativo_id,
                                     data=dt,
-                                    defaults={"valor": Decimal(str(row.get("valor")))}
+                                    valor=Decimal(str(row.get("valor"))),
                                 )
                         except Exception as e:
                             logger.warning("Falha ao restaurar cotação: %s", e)
 
+                _inserir_em_lote(Cotacao, list(cotacoes.values()))
+
             # 3b. Restaurar detalhes de Renda Fixa se fornecidos no backup
+            # Um detalhe por ativo (o último do arquivo), gravados em lote.
             detalhe_records = data_dict.get("data", {}).get("investimento", {}).get("DetalheRendaFixa", [])
             if detalhe_records:
                 logger.debug("Restaurando %d registros de DetalheRendaFixa", len(detalhe_records))
                 from investimento.models import DetalheRendaFixa
-                from datetime import datetime
+                from datetime import date
                 from decimal import Decimal
 
+                detalhes = {}
                 for row in detalhe_records:
                     ativo_uuid = row.get("ativo_uuid")
                     ativo_id = uuid_to_id.get("investimento.Ativo", {}).get(ativo_uuid)
@@ -434,33 +725,30 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                         try:
                             data_str = row.get("data_vencimento")
                             data_vencimento = (
-                                datetime.strptime(data_str, "%Y-%m-%d").date() if data_str else None
+                                date.fromisoformat(data_str) if data_str else None
                             )
-                            DetalheRendaFixa.objects.update_or_create(
+                            detalhes[ativo_id] = DetalheRendaFixa(
                                 ativo_id=ativo_id,
-                                defaults={
-                                    "data_vencimento": data_vencimento,
-                                    "emissor": row.get("emissor") or "",
-                                    "indexador": row.get("indexador") or "",
-                                    "taxa": Decimal(str(row.get("taxa") or 0)),
-                                }
+                                data_vencimento=data_vencimento,
+                                emissor=row.get("emissor") or "",
+                                indexador=row.get("indexador") or "",
+                                taxa=Decimal(str(row.get("taxa") or 0)),
                             )
                         except Exception as e:
                             logger.warning("Falha ao restaurar detalhe de renda fixa: %s", e)
 
+                _inserir_em_lote(DetalheRendaFixa, list(detalhes.values()))
+
             # 4. RECALCULAR TODOS OS ATIVOS após restauração completa das transações
             # Necessário porque os signals foram desconectados durante a importação.
+            # Em lote: as transações de todos os ativos vêm em uma única consulta.
             if ativos_restaurados:
                 try:
-                    from investimento.calculators import recalcular_ativo
-                    for ativo in ativos_restaurados:
-                        try:
-                            ativo.refresh_from_db()  # Garante estado fresco do DB
-                            recalcular_ativo(ativo)
-                        except Exception as recalc_err:
-                            logger.warning(
-                                "Erro ao recalcular ativo %s: %s", ativo, recalc_err
-                            )
+                    from investimento.calculators import recalcular_ativos
+                    try:
+                        recalcular_ativos(ativos_restaurados)
+                    except Exception as recalc_err:
+                        logger.warning("Erro ao recalcular ativos restaurados: %s", recalc_err)
                 except ImportError:
                     logger.debug("Módulo de investimentos não disponível para recálculo.")
 
@@ -484,6 +772,10 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
                 logger.error("Falha ao deduplicar faturas na restauração: %s", e)
                 faturas_removidas = 0
 
+            # 6. Efeito agregado dos signals de Conta/Categoria desligados acima
+            if core_signals_disconnected:
+                atualizar_config(user)
+
     finally:
         # ── Reconectar signals de investimento ───────────────────────────────
         if signals_disconnected:
@@ -498,6 +790,8 @@ def restore_user_data_fcbk(data_dict: dict, user) -> dict:
             try:
                 post_save.connect(monitorar_salvamento_conta, sender=ContaCore)
                 post_delete.connect(monitorar_delecao_conta, sender=ContaCore)
+                post_save.connect(monitorar_salvamento_categoria, sender=CategoriaCore)
+                post_delete.connect(monitorar_delecao_categoria, sender=CategoriaCore)
             except Exception as e:
                 logger.error("Erro ao reconectar signals de fatura do core: %s", e)
 
@@ -558,8 +852,11 @@ def importar_universal(arquivo, usuario, password=None) -> dict:
         if not password:
             raise ValueError("Senha obrigatória para arquivo .fcbk.")
 
-        content = arquivo.read() if hasattr(arquivo, "read") else arquivo
-        data_dict = decrypt_data_fcbk(content, password)
+        # O conteúdo lido não fica referenciado aqui durante a restauração: só o
+        # dicionário decodificado precisa sobreviver até lá
+        data_dict = decrypt_data_fcbk(
+            arquivo.read() if hasattr(arquivo, "read") else arquivo, password
+        )
         return restore_user_data_fcbk(data_dict, usuario)
 
     # Rejeita qualquer outro formato
@@ -16,6 +16,15 @@ from core.services.fatura_service import add_months
 
 HORIZONTE_PADRAO_MESES = 12
 
+# Ocorrências por INSERT ao gravar uma regra com horizonte longo (ex: semanal)
+_LOTE_OCORRENCIAS = 500
+
+# Frequências cujo intervalo entre ocorrências é um número fixo de dias
+_PASSO_DIAS = {
+    ReceitaRecorrente.FREQ_SEMANAL: 7,
+    ReceitaRecorrente.FREQ_QUINZENAL: 14,
+}
+
 
 def _proxima_data(data_atual: date, frequencia: str) -> date:
     """Calcula a próxima data de ocorrência a partir da frequência da regra.
@@ -33,9 +42,35 @@ def _proxima_data(data_atual: date, frequencia: str) -> date:
     raise ValueError(f"Frequência desconhecida: {frequencia!r}")
 
 
+def _datas_ate(inicio: date, limite: date, frequencia: str) -> list[date]:
+    """Lista as datas de ocorrência de `inicio` até `limite` (inclusive).
+
+    Frequências de passo fixo em dias (semanal/quinzenal) são geradas direto por
+    `range` sobre os deslocamentos, sem encadear `_proxima_data` data a data.
+    Mensal/anual continuam encadeadas, pois o clamp de fim de mês de uma
+    ocorrência define o dia da seguinte.
+    """
+    if inicio > limite:
+        return []
+    passo = _PASSO_DIAS.get(frequencia)
+    if passo:
+        return [inicio + timedelta(days=d) for d in range(0, (limite - inicio).days + 1, passo)]
+
+    datas = []
+    while inicio <= limite:
+        datas.append(inicio)
+        inicio = _proxima_data(inicio, frequencia)
+    return datas
+
+
 def gerar_ocorrencias(regra: ReceitaRecorrente, ate_data: date) -> int:
     """Gera as ocorrências (`Conta`) de uma regra até `ate_data`, sem duplicar.
 
+    As datas já existentes são lidas em uma única consulta e as novas ocorrências
+    gravadas com `bulk_create`, em vez de um `get_or_create` por data. Como o
+    `bulk_create` não dispara `post_save`, o timestamp de configuração do usuário
+    (único efeito do signal para receitas sem cartão) é atualizado uma vez ao final.
+
     Args:
         regra (ReceitaRecorrente): A regra de recorrência.
         ate_data (date): Data limite (inclusive) até onde gerar ocorrências.
@@ -52,24 +87,34 @@ def gerar_ocorrencias(regra: ReceitaRecorrente, ate_data: date) -> int:
     )
     candidata = _proxima_data(ultima, regra.frequencia) if ultima else regra.data_inicio
 
-    criadas = 0
-    while candidata <= limite:
-        _, criado = Conta.objects.get_or_create(
+    datas = _datas_ate(candidata, limite, regra.frequencia)
+    if not datas:
+        return 0
+
+    existentes = set(
+        regra.ocorrencias.filter(data_prevista__gte=datas[0], data_prevista__lte=datas[-1])
+        .values_list("data_prevista", flat=True)
+    )
+    novas = [
+        Conta(
             receita_recorrente=regra,
-            data_prevista=candidata,
-            defaults={
-                "usuario": regra.usuario,
-                "tipo": Conta.TIPO_RECEITA,
-                "descricao": regra.descricao,
-                "categoria": regra.categoria,
-                "valor": regra.valor,
-            },
+            data_prevista=data_prevista,
+            usuario=regra.usuario,
+            tipo=Conta.TIPO_RECEITA,
+            descricao=regra.descricao,
+            categoria=regra.categoria,
+            valor=regra.valor,
         )
-        if criado:
-            criadas += 1
-        candidata = _proxima_data(candidata, regra.frequencia)
+        for data_prevista in datas
+        if data_prevista not in existentes
+    ]
+    if novas:
+        from core.signals import atualizar_config
+
+        Conta.objects.bulk_create(novas, batch_size=_LOTE_OCORRENCIAS)
+        atualizar_config(regra.usuario)
 
-    return criadas
+    return len(novas)
 
 
 def criar_regra_e_gerar(usuario, descricao, categoria, valor, frequencia, data_inicio, data_fim=None) -> tuple[ReceitaRecorrente, Conta]:
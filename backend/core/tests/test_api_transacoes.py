@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import User
 from django.utils import timezone
 from rest_framework import status
@@ -107,3 +109,68 @@ class TransacoesAPITestCase(APITestCase):
         # Unrealized revenue should show expected date
         self.assertEqual(rev_tx["data"], "2026-05-10")
         self.assertFalse(rev_tx["transacao_realizada"])
+
+    def test_lote_so_cria_categorias_depois_de_validar_todos_os_itens(self):
+        self.client.force_authenticate(self.user_a)
+        url = "/api/financeiro/contas-pagar/lote/"
+        itens = [
+            {"descricao": "Padaria", "valor": "12,50", "data_vencimento": "2026-05-03", "categoria": "Padaria"},
+            {"descricao": "Aluguel", "valor": "1.200,00", "data_vencimento": "2026-05-05", "categoria": "Aluguel"},
+            {"descricao": "Sem valor", "valor": "", "data_vencimento": "2026-05-06", "categoria": "Outros"},
+        ]
+
+        response = self.client.post(url, {"itens": itens}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Categoria.objects.filter(usuario=self.user_a, nome="Padaria").exists())
+
+        response = self.client.post(url, {"itens": itens[:2] * 2}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        padaria = Categoria.objects.get(usuario=self.user_a, nome="Padaria")
+        self.assertEqual(Conta.objects.filter(usuario=self.user_a, categoria=padaria).count(), 2)
+        self.assertEqual(
+            Conta.objects.filter(usuario=self.user_a, categoria=self.cat_despesa, descricao="Aluguel").count(), 2
+        )
+
+    def test_lote_usa_categoria_padrao_de_despesa_quando_item_nao_informa(self):
+        padrao = Categoria.objects.create(
+            usuario=self.user_a, nome="Gastos", tipo=Categoria.TIPO_DESPESA, is_default=True
+        )
+        self.client.force_authenticate(self.user_a)
+        itens = [{"descricao": "Farmácia", "valor": "30", "data_vencimento": "2026-05-03"}]
+
+        response = self.client.post("/api/financeiro/contas-pagar/lote/", {"itens": itens}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Conta.objects.get(usuario=self.user_a, descricao="Farmácia").categoria, padrao)
+
+        # Sem categoria padrão, cai na primeira categoria de despesa por nome
+        padrao.delete()
+        response = self.client.post("/api/financeiro/contas-pagar/lote/", {"itens": itens}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Conta.objects.filter(usuario=self.user_a, descricao="Farmácia").order_by("id").last().categoria,
+            self.cat_despesa,
+        )
+
+    def test_lote_aceita_valor_numerico_ou_texto_com_espacos(self):
+        self.client.force_authenticate(self.user_a)
+        url = "/api/financeiro/contas-pagar/lote/"
+
+        response = self.client.post(url, {"itens": [
+            {"descricao": "Vazio", "valor": "   ", "data_vencimento": "2026-05-03"},
+        ]}, format="json")
+        self.assertEqual(response.json()["erros"], ["Linha 1: Valor é obrigatório."])
+
+        response = self.client.post(url, {"itens": [
+            {"descricao": "Número", "valor": 10.5, "data_vencimento": "2026-05-03"},
+            {"descricao": "Inteiro", "valor": 7, "data_vencimento": "2026-05-03"},
+            {"descricao": "Soma", "valor": 0.1 + 0.2, "data_vencimento": "2026-05-03"},
+            {"descricao": "Texto", "valor": " 1.234,56 ", "data_vencimento": "03/05/2026"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Conta.objects.filter(
+                usuario=self.user_a, descricao__in=["Número", "Inteiro", "Soma", "Texto"]
+            ).values_list("valor", flat=True)),
+            [Decimal("0.30"), Decimal("7.00"), Decimal("10.50"), Decimal("1234.56")],
+        )
@@ -8,13 +8,15 @@ não é descoberto por `get_backupable_models` e depende do tratamento manual no
 serviço de exportação — sem ele, o histórico seria silenciosamente perdido.
 """
 
+import io
 from decimal import Decimal
+from unittest import mock
 
 from django.contrib.auth.models import User
 from django.test import TestCase
 
 from core.models import AporteMeta, MetaFinanceira, PlanoMetas
-from core.services.export_service import export_user_data, get_backupable_models
+from core.services.export_service import escrever_backup, export_user_data, get_backupable_models
 from core.services.import_service import decrypt_data_fcbk, restore_user_data_fcbk
 
 SENHA = "senha-de-backup-123"
@@ -92,6 +94,15 @@ class BackupMetasTests(TestCase):
             {a["meta_uuid"] for a in core["AporteMeta"]}, {str(self.celular.uuid)}
         )
 
+    def test_backup_gravado_em_blocos_no_destino_e_restauravel(self):
+        destino = io.BytesIO()
+        # Blocos pequenos forçam várias gravações de Base64 no destino
+        with mock.patch("core.services.export_service._BLOCO_BASE64", 30):
+            escrever_backup(destino, self.user, SENHA)
+
+        dados = decrypt_data_fcbk(destino.getvalue(), SENHA)
+        self.assertEqual(len(dados["data"]["core"]["AporteMeta"]), 2)
+
     # ── Cobertura da restauração ─────────────────────────────────────────────
 
     def test_restaura_a_base_de_calculo(self):
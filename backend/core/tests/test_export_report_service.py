@@ -0,0 +1,235 @@
+"""Testes do serviço de relatórios exportáveis (Excel e PDF).
+
+Garantem que as planilhas e o PDF continuam trazendo as mesmas informações
+enquanto a geração é otimizada para períodos com muitos lançamentos.
+"""
+
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from openpyxl import load_workbook
+from reportlab.platypus import TableStyle
+
+from core.models import CartaoCredito, Categoria, Conta
+from core.services.export_report_service import (
+    _brl,
+    _num,
+    _tabelas_em_blocos,
+    gerar_excel,
+    gerar_pdf,
+    get_alocacao_data,
+    get_investimentos,
+)
+from investimento.models import (
+    Ativo,
+    CategoriaAtivo,
+    ClasseAtivo,
+    Cotacao,
+    SubcategoriaAtivo,
+    Transacao as TransacaoInvestimento,
+)
+
+INICIO = date(2026, 1, 1)
+FIM = date(2026, 12, 31)
+
+
+class ExportReportServiceTests(TestCase):
+    """Geração dos relatórios de movimentações e investimentos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="relatorio", password="senha-forte-123")
+        self.categoria = Categoria.objects.create(
+            usuario=self.user, nome="Mercado", tipo=Categoria.TIPO_DESPESA
+        )
+        self.cartao = CartaoCredito.objects.create(
+            usuario=self.user, nome="Nubank", dia_fechamento=1, dia_vencimento=10
+        )
+
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_RECEITA, descricao="Salário",
+            valor=Decimal("5000.00"), data_prevista=date(2026, 3, 5), transacao_realizada=True,
+        )
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Feira",
+            valor=Decimal("1234.56"), data_prevista=date(2026, 3, 8), categoria=self.categoria,
+        )
+        # A compra individual de cartão não entra no relatório, apenas a fatura
+        # consolidada gerada para ela
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Compra no cartão",
+            valor=Decimal("99.90"), data_prevista=date(2026, 3, 10), cartao=self.cartao,
+        )
+
+        self.ativo = Ativo.objects.create(usuario=self.user, ticker="PETR4", nome="Petrobras")
+        TransacaoInvestimento.objects.create(
+            usuario=self.user, ativo=self.ativo, tipo=TransacaoInvestimento.TIPO_COMPRA,
+            data=date(2026, 2, 1), quantidade=Decimal("10"), preco_unitario=Decimal("30.00"),
+            valor_total=Decimal("300.00"),
+        )
+        TransacaoInvestimento.objects.create(
+            usuario=self.user, ativo=self.ativo, tipo=TransacaoInvestimento.TIPO_DIVIDENDO,
+            data=date(2026, 4, 1), quantidade=Decimal("10"), preco_unitario=Decimal("1.50"),
+            valor_total=Decimal("15.00"),
+        )
+
+    def test_formatacao_no_padrao_brasileiro(self):
+        self.assertEqual(_brl(Decimal("1234567.8")), "R$ 1.234.567,80")
+        self.assertEqual(_brl(Decimal("-0.5")), "R$ -0,50")
+        self.assertEqual(_num(10), "10,00")
+
+    def test_excel_movimentacoes_exclui_compras_de_cartao(self):
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "geral")))
+
+        self.assertEqual(wb.sheetnames, ["Movimentações", "Resumo Mensal"])
+        linhas = [r for r in wb["Movimentações"].iter_rows(min_row=4, values_only=True) if r[0]]
+        descricoes = [r[2] for r in linhas]
+        self.assertEqual(descricoes, ["Salário", "Feira", "Fatura Nubank - 03/2026"])
+        self.assertEqual(linhas[1][0].date(), date(2026, 3, 8))
+        self.assertEqual(linhas[1][3], "Mercado")
+        self.assertAlmostEqual(linhas[1][4], 1234.56)
+
+    def test_excel_resumo_mensal_soma_receitas_e_despesas(self):
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Aluguel",
+            valor=Decimal("1500.00"), data_prevista=date(2026, 1, 10),
+        )
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "geral")))
+
+        resumo = list(wb["Resumo Mensal"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(
+            resumo,
+            [("2026-01", 0, 1500.0, -1500.0), ("2026-03", 5000.0, 1334.46, 3665.54)],
+        )
+
+    def test_excel_investimentos_gera_abas_da_carteira(self):
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "investimentos")))
+
+        self.assertEqual(
+            wb.sheetnames, ["Carteira", "Proventos", "Alocação", "Transações Invest."]
+        )
+        carteira = list(wb["Carteira"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(carteira[0][0], "PETR4")
+        self.assertAlmostEqual(carteira[0][6], 300.0)
+        proventos = list(wb["Proventos"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(proventos, [("PETR4", 15.0)])
+
+    def test_excel_carteira_usa_cotacao_mais_recente(self):
+        Cotacao.objects.create(ativo=self.ativo, data=date(2026, 5, 1), valor=Decimal("35.00"))
+        Cotacao.objects.create(ativo=self.ativo, data=date(2026, 6, 1), valor=Decimal("40.00"))
+
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "investimentos")))
+
+        carteira = list(wb["Carteira"].iter_rows(min_row=2, values_only=True))
+        self.assertAlmostEqual(carteira[0][7], 400.0)  # Mercado
+        self.assertAlmostEqual(carteira[0][11], 100.0)  # Lucro/Prej.
+
+    def test_alocacao_soma_valores_de_mercado_por_classe(self):
+        Cotacao.objects.create(ativo=self.ativo, data=date(2026, 5, 1), valor=Decimal("33.333"))
+        outro = Ativo.objects.create(usuario=self.user, ticker="ITSA4")
+        TransacaoInvestimento.objects.create(
+            usuario=self.user, ativo=outro, tipo=TransacaoInvestimento.TIPO_COMPRA,
+            data=date(2026, 2, 1), quantidade=Decimal("3"), preco_unitario=Decimal("22.22"),
+            valor_total=Decimal("66.66"),
+        )
+
+        self.assertEqual(
+            get_alocacao_data(self.user, FIM),
+            [{"classe": "Outros", "valor": 399.99, "percentual": 100.0}],
+        )
+
+    def test_alocacao_e_carteira_carregam_classificacao_sem_consulta_por_ativo(self):
+        classe, _ = ClasseAtivo.objects.get_or_create(usuario=self.user, nome="Renda Variável")
+        categoria, _ = CategoriaAtivo.objects.get_or_create(usuario=self.user, classe=classe, nome="Ações")
+        sub, _ = SubcategoriaAtivo.objects.get_or_create(usuario=self.user, categoria=categoria, nome="Petróleo")
+        Ativo.objects.filter(pk=self.ativo.pk).update(subcategoria=sub)
+
+        with self.assertNumQueries(2):
+            ativos = list(get_investimentos(self.user, INICIO, FIM))
+            self.assertEqual(ativos[0].subcategoria.categoria.classe.nome, "Renda Variável")
+        with self.assertNumQueries(2):
+            aloc = get_alocacao_data(self.user, FIM)
+        self.assertEqual(aloc[0]["classe"], "Renda Variável")
+
+    def test_investimentos_inclui_ativo_zerado_apenas_com_transacao_no_periodo(self):
+        vendido = Ativo.objects.create(usuario=self.user, ticker="VALE3")
+        TransacaoInvestimento.objects.create(
+            usuario=self.user, ativo=vendido, tipo=TransacaoInvestimento.TIPO_DIVIDENDO,
+            data=date(2026, 5, 2), quantidade=Decimal("1"), valor_total=Decimal("2.00"),
+        )
+        Ativo.objects.create(usuario=self.user, ticker="ITSA4")
+
+        tickers = [a.ticker for a in get_investimentos(self.user, INICIO, FIM)]
+        self.assertEqual(tickers, ["PETR4", "VALE3"])
+
+        tickers = [a.ticker for a in get_investimentos(self.user, date(2026, 6, 1), FIM)]
+        self.assertEqual(tickers, ["PETR4"])
+
+    def test_pdf_completo_e_valido(self):
+        conteudo = gerar_pdf(self.user, INICIO, FIM, "completo")
+
+        self.assertTrue(conteudo.startswith(b"%PDF"))
+        self.assertIn(b"FreeCash", conteudo)
+
+    def test_pdf_divide_tabela_longa_em_varias_paginas(self):
+        Conta.objects.bulk_create(
+            Conta(
+                usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao=f"Despesa {i}",
+                valor=Decimal("10.00"), data_prevista=INICIO + timedelta(days=i % 300),
+            )
+            for i in range(400)
+        )
+
+        conteudo = gerar_pdf(self.user, INICIO, FIM, "geral")
+
+        self.assertTrue(conteudo.startswith(b"%PDF"))
+        self.assertGreater(conteudo.count(b"/Type /Page\n"), 5)
+
+    def test_excel_preserva_estilos_das_celulas_de_dados(self):
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "geral")))
+
+        ws = wb["Movimentações"]
+        self.assertEqual(ws["E4"].number_format, "#,##0.00")
+        self.assertEqual(ws["A4"].number_format, "DD/MM/YYYY")
+        self.assertEqual(ws["E4"].alignment.horizontal, "right")
+        self.assertEqual(ws["A4"].border.left.style, "thin")
+        self.assertEqual(ws["A3"].font.color.rgb, "00FFFFFF")
+
+    def test_pdf_divide_listagem_em_tabelas_de_tamanho_fixo(self):
+        linhas = [[str(i)] for i in range(1201)]
+
+        tabelas = _tabelas_em_blocos(["N"], linhas, [50], TableStyle([]))
+
+        self.assertEqual([len(t._cellvalues) for t in tabelas], [501, 501, 202])
+        self.assertTrue(all(t._cellvalues[0] == ["N"] for t in tabelas))
+        self.assertEqual(len(_tabelas_em_blocos(["N"], [], [50], TableStyle([]))), 1)
+
+    def test_excel_reaproveita_estilos_entre_abas_sem_perder_formatacao(self):
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "investimentos")))
+
+        for aba in ("Carteira", "Proventos", "Alocação", "Transações Invest."):
+            self.assertEqual(wb[aba]["A1"].font.color.rgb, "00FFFFFF")
+            self.assertEqual(wb[aba]["A1"].fill.fgColor.rgb, "003B82F6")
+        self.assertEqual(wb["Proventos"]["B2"].number_format, "#,##0.00")
+        self.assertEqual(wb["Transações Invest."]["A2"].number_format, "DD/MM/YYYY")
+        self.assertEqual(wb["Transações Invest."]["G2"].number_format, "#,##0.00")
+
+    def test_excel_alocacao_reaproveita_carteira_sem_posicoes_zeradas(self):
+        vendido = Ativo.objects.create(usuario=self.user, ticker="VALE3")
+        TransacaoInvestimento.objects.create(
+            usuario=self.user, ativo=vendido, tipo=TransacaoInvestimento.TIPO_DIVIDENDO,
+            data=date(2026, 5, 2), quantidade=Decimal("1"), valor_total=Decimal("2.00"),
+        )
+
+        wb = load_workbook(io.BytesIO(gerar_excel(self.user, INICIO, FIM, "investimentos")))
+
+        carteira = [r[0] for r in wb["Carteira"].iter_rows(min_row=2, values_only=True)]
+        self.assertEqual(carteira, ["PETR4", "VALE3"])
+        alocacao = list(wb["Alocação"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(alocacao, [("Outros", 300.0, 100.0)])
+        self.assertEqual(
+            get_alocacao_data(self.user, FIM),
+            [{"classe": "Outros", "valor": 300.0, "percentual": 100.0}],
+        )
@@ -251,3 +251,71 @@ class EndToEndFlowScreensTestCase(APITestCase):
         url_conciliacao = reverse('api-ferramentas-conciliacao')
         response_conc = self.client.get(url_conciliacao)
         self.assertEqual(response_conc.status_code, status.HTTP_200_OK)
+
+    def test_dre_separa_receitas_despesas_fixas_e_de_cartao(self):
+        """
+        [Tela de Relatórios — DRE]
+        Receitas, despesas fixas e compras de cartão do ano entram cada uma na
+        sua linha; a fatura consolidada e lançamentos de outros anos ficam de fora.
+        """
+        cartao = CartaoCredito.objects.create(
+            usuario=self.user, nome="Visa", dia_fechamento=1, dia_vencimento=10
+        )
+        lancamentos = [
+            (Conta.TIPO_RECEITA, "Salário", "5000.00", datetime.date(2025, 3, 5), None),
+            (Conta.TIPO_DESPESA, "Aluguel", "1500.00", datetime.date(2025, 3, 10), None),
+            (Conta.TIPO_DESPESA, "Mercado", "250.40", datetime.date(2025, 4, 10), cartao),
+            (Conta.TIPO_DESPESA, "Aluguel", "1400.00", datetime.date(2024, 12, 10), None),
+        ]
+        for tipo, descricao, valor, data, cartao_conta in lancamentos:
+            Conta.objects.create(
+                usuario=self.user, tipo=tipo, descricao=descricao, valor=Decimal(valor),
+                data_prevista=data, cartao=cartao_conta, categoria=self.cat_despesa,
+            )
+
+        response = self.client.get(reverse('api-relatorios-dre'), {"ano": 2025})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["receitas"]["total_receitas"], 5000.0)
+        self.assertEqual(data["despesas"]["despesas_fixas"], 1500.0)
+        self.assertEqual(data["despesas"]["despesas_variaveis"], 250.4)
+
+    def test_dashboard_executivo_liquidez_e_dre_mensal(self):
+        """
+        [Tela do Dashboard Executivo]
+        Sem histórico de investimentos a série cobre os últimos meses; a liquidez
+        acumula o caixa realizado e a DRE traz o realizado de cada mês.
+        """
+        from dateutil.relativedelta import relativedelta
+        from django.utils import timezone
+
+        hoje = timezone.localdate()
+        mes_passado = hoje - relativedelta(months=1)
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_RECEITA, descricao="Salário",
+            valor=Decimal("1000.00"), data_prevista=mes_passado,
+            transacao_realizada=True, data_realizacao=mes_passado, categoria=self.cat_receita,
+        )
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Aluguel",
+            valor=Decimal("300.00"), data_prevista=hoje,
+            transacao_realizada=True, data_realizacao=hoje, categoria=self.cat_despesa,
+        )
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Pendente",
+            valor=Decimal("999.00"), data_prevista=hoje, categoria=self.cat_despesa,
+        )
+
+        response = self.client.get(reverse('api-dashboard-executivo'), {"meses": 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data["meses"]), 3)
+        self.assertEqual(data["liquidez"], [0.0, 1000.0, 700.0])
+        self.assertEqual(data["evolucao_mensal"], [0.0, 1000.0, -300.0])
+        self.assertEqual(
+            [(l["receitas"], l["despesas"], l["saldo"]) for l in data["tabela_dre"]],
+            [(0.0, 300.0, -300.0), (1000.0, 0.0, 1000.0), (0.0, 0.0, 0.0)],
+        )
+        self.assertEqual(data["kpis"]["total_liquidez"], 700.0)
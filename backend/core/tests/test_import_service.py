@@ -11,16 +11,24 @@ import base64
 import hashlib
 import json
 import os
+from unittest import mock
 
 from django.contrib.auth.models import User
+from django.db.models.deletion import Collector
 from django.test import TestCase
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 
+from core.models import CartaoCredito, Categoria, Conta, ExtratoImportado, LinhaExtrato
 from core.services.export_service import export_user_data
-from core.services.import_service import restore_user_data_fcbk, decrypt_data_fcbk
+from core.services.import_service import (
+    _apagar_em_massa,
+    decrypt_data_fcbk,
+    restore_user_data_fcbk,
+)
 from investimento.models import (
     ClasseAtivo,
     CategoriaAtivo,
@@ -281,6 +289,47 @@ class RestoreUserDataFcbkTests(TestCase):
         self.assertEqual(cotacao.data, data_cotacao)
         self.assertEqual(cotacao.valor, valor_cotacao)
 
+    def test_cotacoes_e_aportes_gravados_em_lote(self):
+        """Cotações repetidas no arquivo ficam com a última linha e um aporte com
+        UUID de outra conta é restaurado com UUID novo, sem tocar no alheio."""
+        from core.models import AporteMeta, MetaFinanceira
+        from investimento.models import Cotacao
+        import datetime
+        from decimal import Decimal
+
+        Cotacao.objects.create(ativo=self.ativo, data=datetime.date(2026, 6, 24), valor=Decimal("35.50"))
+        meta = MetaFinanceira.objects.create(
+            usuario=self.user, nome="Reserva", tipo=MetaFinanceira.TIPO_RESERVA_EMERGENCIA,
+            valor_alvo=Decimal("1000.00"),
+        )
+        aporte = AporteMeta.objects.create(meta=meta, valor=Decimal("100.00"))
+        senha = "senha_de_teste"
+        data_dict = decrypt_data_fcbk(export_user_data(self.user, senha).encode(), senha)
+        cotacoes = data_dict["data"]["investimento"]["Cotacao"]
+        cotacoes.append(dict(cotacoes[0], valor="36.00"))
+
+        # Outra conta passa a usar o UUID do aporte do backup
+        outro = User.objects.create_user(username="outro_aporte", password="outra_senha_123")
+        meta_outro = MetaFinanceira.objects.create(
+            usuario=outro, nome="Viagem", tipo=MetaFinanceira.TIPO_RESERVA_EMERGENCIA,
+            valor_alvo=Decimal("500.00"),
+        )
+        aporte.delete()
+        AporteMeta.objects.create(meta=meta_outro, valor=Decimal("7.00"), uuid=aporte.uuid)
+
+        restore_user_data_fcbk(data_dict, self.user)
+
+        ativo = Ativo.objects.get(usuario=self.user, ticker="PETR4")
+        self.assertEqual(
+            list(Cotacao.objects.filter(ativo=ativo).values_list("valor", flat=True)),
+            [Decimal("36.00")],
+        )
+        restaurado = AporteMeta.objects.get(meta__usuario=self.user)
+        self.assertEqual(restaurado.valor, Decimal("100.00"))
+        self.assertNotEqual(restaurado.uuid, aporte.uuid)
+        alheio = AporteMeta.objects.get(uuid=aporte.uuid)
+        self.assertEqual((alheio.meta_id, alheio.valor), (meta_outro.id, Decimal("7.00")))
+
     def test_backup_legado_sem_compressao_ainda_funciona(self):
         """Arquivos .fcbk gerados antes da versão 4.1 (sem zlib) devem continuar
         sendo restauráveis, garantindo compatibilidade retroativa."""
@@ -336,3 +385,190 @@ class RestoreUserDataFcbkTests(TestCase):
             "Apenas as 2 transações com UUID válido deveriam ser restauradas."
         )
 
+    def test_signals_de_categoria_adiados_para_o_fim_da_restauracao(self):
+        """Cada categoria apagada ou restaurada não deve atualizar a configuração
+        do usuário individualmente: o efeito é aplicado uma única vez ao final."""
+        for i in range(5):
+            Categoria.objects.create(usuario=self.user, nome=f"Categoria {i}", tipo=Categoria.TIPO_DESPESA)
+        senha = "senha_de_teste"
+        data_dict = decrypt_data_fcbk(export_user_data(self.user, senha).encode(), senha)
+
+        with mock.patch("core.signals.atualizar_config") as atualizar:
+            restore_user_data_fcbk(data_dict, self.user)
+            self.assertEqual(atualizar.call_count, 1)
+
+            # Os signals voltam a valer depois da restauração
+            Categoria.objects.create(usuario=self.user, nome="Nova", tipo=Categoria.TIPO_DESPESA)
+            self.assertEqual(atualizar.call_count, 2)
+
+        self.assertEqual(Categoria.objects.filter(usuario=self.user).count(), 6)
+
+    def test_transacoes_restauradas_em_lote(self):
+        """As transações são gravadas em lote: sem ativo de origem o registro é
+        ignorado e um UUID já usado por outra conta recebe um UUID novo."""
+        self._create_transacoes()
+        senha = "senha_de_teste"
+        data_dict = decrypt_data_fcbk(export_user_data(self.user, senha).encode(), senha)
+        transacoes = sorted(data_dict["data"]["investimento"]["Transacao"], key=lambda t: t["data"])
+        transacoes[0]["ativo_uuid"] = None
+        uuids = [t["uuid"] for t in transacoes]
+
+        # Outra conta passa a usar o UUID de uma das transações do backup
+        Transacao.objects.filter(usuario=self.user).delete()
+        outro = User.objects.create_user(username="outro_lote", password="outra_senha_123")
+        ativo_outro = Ativo.objects.create(usuario=outro, ticker="VALE3")
+        Transacao.objects.create(
+            usuario=outro, ativo=ativo_outro, tipo=Transacao.TIPO_COMPRA, data="2024-01-10",
+            quantidade=1, preco_unitario=10, valor_total=10, uuid=uuids[1],
+        )
+
+        resultado = restore_user_data_fcbk(data_dict, self.user)
+
+        self.assertEqual(resultado["ignorados"], 1)
+        restauradas = Transacao.objects.filter(usuario=self.user).order_by("data")
+        self.assertEqual([str(t.data) for t in restauradas], ["2024-03-15", "2024-06-20"])
+        self.assertNotEqual(str(restauradas[0].uuid), uuids[1])
+        self.assertEqual(str(restauradas[1].uuid), uuids[2])
+        self.assertEqual(Transacao.objects.filter(usuario=outro).count(), 1)
+        ativo = Ativo.objects.get(usuario=self.user, ticker="PETR4")
+        self.assertEqual(float(ativo.quantidade), 20.0)
+
+    def test_transacoes_gravadas_a_cada_lote_cheio(self):
+        """O restore grava cada lote ao enchê-lo, sem acumular todo o histórico."""
+        from core.services import import_service
+
+        self._create_transacoes()
+        senha = "senha_de_teste"
+        data_dict = decrypt_data_fcbk(export_user_data(self.user, senha).encode(), senha)
+
+        with mock.patch.object(import_service, "_LOTE_RESTAURACAO", 2), mock.patch.object(
+            import_service, "_restaurar_em_lote", wraps=import_service._restaurar_em_lote
+        ) as gravar:
+            resultado = restore_user_data_fcbk(data_dict, self.user)
+
+        tamanhos = [
+            len(c.args[2]) for c in gravar.call_args_list if c.args[0] is Transacao
+        ]
+        self.assertEqual(tamanhos, [2, 1])
+        self.assertEqual(resultado["ignorados"], 0)
+        self.assertEqual(Transacao.objects.filter(usuario=self.user).count(), 3)
+
+    def test_cadastros_restaurados_em_lote_mantem_referencias(self):
+        """Categorias e cartões saem em lote e as contas apontam para os registros
+        restaurados; uma categoria repetida no arquivo cai na de mesmo nome."""
+        from core.services import import_service
+
+        categoria = Categoria.objects.create(usuario=self.user, nome="Mercado", tipo=Categoria.TIPO_DESPESA)
+        cartao = CartaoCredito.objects.create(usuario=self.user, nome="Nubank")
+        Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Feira", valor=50,
+            data_prevista="2024-01-10", categoria=categoria,
+        )
+        senha = "senha_de_teste"
+        data_dict = decrypt_data_fcbk(export_user_data(self.user, senha).encode(), senha)
+
+        # Mesma categoria duas vezes no arquivo, com outro UUID; a conta usa a cópia
+        categorias = data_dict["data"]["core"]["Categoria"]
+        original = next(c for c in categorias if c["nome"] == "Mercado")
+        uuid_original = original["uuid"]
+        copia = dict(original, uuid="00000000-0000-4000-8000-000000000001")
+        categorias.append(copia)
+        data_dict["data"]["core"]["Conta"][0]["categoria_uuid"] = copia["uuid"]
+
+        with mock.patch.object(
+            import_service, "_restaurar_em_lote", wraps=import_service._restaurar_em_lote
+        ) as gravar:
+            resultado = restore_user_data_fcbk(data_dict, self.user)
+
+        modelos = {c.args[0] for c in gravar.call_args_list}
+        self.assertTrue({Categoria, CartaoCredito, ClasseAtivo}.issubset(modelos))
+        self.assertNotIn(Conta, modelos)
+        self.assertEqual(resultado["ignorados"], 0)
+
+        conta = Conta.objects.get(usuario=self.user, descricao="Feira")
+        self.assertEqual(conta.categoria.nome, "Mercado")
+        self.assertEqual(str(conta.categoria.uuid), uuid_original)
+        self.assertEqual(Categoria.objects.filter(usuario=self.user, nome="Mercado").count(), 1)
+        self.assertEqual(
+            str(CartaoCredito.objects.get(usuario=self.user).uuid), str(cartao.uuid)
+        )
+
+    def test_remocao_em_massa_aplica_cascade_e_set_null_sem_carregar_registros(self):
+        """Sem signals de deleção, as relações são resolvidas por consulta e os
+        registros saem em um DELETE direto, sem passar pelo Collector do Django."""
+        outro = User.objects.create_user(username="outro_remocao", password="outra_senha_123")
+        classes_outro = ClasseAtivo.objects.filter(usuario=outro).count()
+
+        with mock.patch.object(Collector, "collect", side_effect=AssertionError):
+            removidas = _apagar_em_massa(ClasseAtivo.objects.filter(usuario=self.user))
+
+        self.assertGreater(removidas, 0)
+        self.assertFalse(ClasseAtivo.objects.filter(usuario=self.user).exists())
+        self.assertFalse(CategoriaAtivo.objects.filter(usuario=self.user).exists())
+        self.assertFalse(SubcategoriaAtivo.objects.filter(usuario=self.user).exists())
+        self.ativo.refresh_from_db()
+        self.assertIsNone(self.ativo.subcategoria_id)
+        self.assertEqual(ClasseAtivo.objects.filter(usuario=outro).count(), classes_outro)
+
+    def test_remocao_em_massa_respeita_signals_conectados(self):
+        """Com o post_delete de Conta ativo, a remoção segue pelo delete() comum."""
+        conta = Conta.objects.create(
+            usuario=self.user, tipo=Conta.TIPO_DESPESA, descricao="Luz",
+            valor=100, data_prevista="2024-01-10",
+        )
+        extrato = ExtratoImportado.objects.create(usuario=self.user, arquivo_nome="extrato.pdf")
+        linha = LinhaExtrato.objects.create(
+            extrato=extrato, data="2024-01-10", descricao="LUZ", valor=100, tipo="D",
+            conta_vinculada=conta,
+        )
+
+        with mock.patch("core.signals.atualizar_config") as atualizar:
+            self.assertEqual(_apagar_em_massa(Conta.objects.filter(usuario=self.user)), 1)
+            atualizar.assert_called_once_with(self.user)
+
+        linha.refresh_from_db()
+        self.assertIsNone(linha.conta_vinculada_id)
+
+    def test_chave_do_backup_derivada_uma_vez_por_senha(self):
+        """Reimportar o mesmo arquivo reaproveita a chave e a cifra; outra senha deriva de novo."""
+        senha = "senha_de_teste"
+        encrypted = export_user_data(self.user, senha).encode()
+
+        with mock.patch(
+            "core.services.import_service.Scrypt", wraps=Scrypt
+        ) as kdf, mock.patch(
+            "core.services.import_service.AESGCM", wraps=AESGCM
+        ) as cifra:
+            decrypt_data_fcbk(encrypted, senha)
+            decrypt_data_fcbk(encrypted, senha)
+            self.assertEqual(kdf.call_count, 1)
+            self.assertEqual(cifra.call_count, 1)
+
+            with self.assertRaises(ValueError):
+                decrypt_data_fcbk(encrypted, "senha_errada")
+            self.assertEqual(kdf.call_count, 2)
+
+    def test_backup_adulterado_rejeitado(self):
+        """Um byte alterado no conteúdo cifrado invalida o hash de integridade."""
+        senha = "senha_de_teste"
+        bruto = bytearray(base64.b64decode(export_user_data(self.user, senha)))
+        bruto[-1] ^= 0xFF
+
+        with self.assertRaisesMessage(ValueError, "VIOLADO"):
+            decrypt_data_fcbk(base64.b64encode(bytes(bruto)), senha)
+
+    def test_backup_novo_usa_scrypt_e_legado_continua_com_pbkdf2(self):
+        """Backups 4.2 trazem o cabeçalho da KDF (scrypt); os antigos seguem no PBKDF2."""
+        senha = "senha_de_teste"
+        encrypted = export_user_data(self.user, senha)
+        self.assertEqual(base64.b64decode(encrypted)[32:37], b"FCBK\x01")
+
+        legado = _encrypt_sem_compressao(
+            {"metadata": {"version": "4.0", "username": self.user.username}, "data": {}}, senha
+        )
+        with mock.patch("core.services.import_service.PBKDF2HMAC", wraps=PBKDF2HMAC) as pbkdf2, \
+                mock.patch("core.services.import_service.Scrypt", wraps=Scrypt) as scrypt:
+            self.assertEqual(decrypt_data_fcbk(encrypted.encode(), senha)["metadata"]["version"], "4.2")
+            self.assertEqual(decrypt_data_fcbk(legado.encode(), senha)["metadata"]["version"], "4.0")
+
+        self.assertEqual((scrypt.call_count, pbkdf2.call_count), (1, 1))
@@ -9,7 +9,13 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import AccessToken
 from core.models import CartaoCredito, ExtratoImportado, LinhaExtrato, Conta
-from core.services.extrato_parser import processar_pdf
+from core.services.extrato_parser import (
+    _data_extrato,
+    _extrair_linha,
+    parse_layout_colunas,
+    parse_pdf_nubank,
+    processar_pdf,
+)
 
 class ImportacaoExtratoTestCase(APITestCase):
     def setUp(self):
@@ -367,3 +373,225 @@ class ImportacaoExtratoTestCase(APITestCase):
         self.assertEqual(compra.data_compra, date(2026, 4, 10))
 
 
+    @patch('core.services.extrato_parser.processar_pdf')
+    def test_upload_repetido_nao_duplica_lancamentos(self, mock_processar):
+        """Reenviar a fatura, ou uma linha repetida no próprio arquivo, não duplica compras."""
+        mock_processar.return_value = [
+            {"data": date(2026, 5, 10), "descricao": "SPOTIFY", "valor": Decimal("20.90"), "tipo": "D"},
+            {"data": date(2026, 5, 10), "descricao": "SPOTIFY", "valor": Decimal("20.90"), "tipo": "D"},
+            {"data": date(2026, 5, 12), "descricao": "ESTORNO", "valor": Decimal("5.00"), "tipo": "C"},
+        ]
+
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        import io
+        adicionadas = []
+        for _ in range(2):
+            dummy_file = io.BytesIO(b"dummy pdf content")
+            dummy_file.name = "test_fatura.pdf"
+            response = self.client.post(
+                "/api/ferramentas/importar-extrato/",
+                {
+                    "arquivo": dummy_file,
+                    "cartao": str(self.cartao.uuid),
+                    "banco": "santander"
+                },
+                format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            adicionadas.append(response.json()["linhas_adicionadas"])
+
+        self.assertEqual(adicionadas, [2, 0])
+        self.assertEqual(
+            Conta.objects.filter(usuario=self.user, eh_fatura_cartao=False, descricao="SPOTIFY").count(), 1
+        )
+
+    @patch('core.services.extrato_parser.processar_pdf')
+    def test_upload_consolida_fatura_de_cada_vencimento(self, mock_processar):
+        """As compras importadas em lote entram na fatura consolidada do seu vencimento."""
+        mock_processar.return_value = [
+            {"data": date(2026, 5, 10), "descricao": "SPOTIFY", "valor": Decimal("20.90"), "tipo": "D"},
+            {"data": date(2026, 5, 12), "descricao": "KABUM-KABUM", "valor": Decimal("150.00"), "tipo": "D"},
+            {"data": date(2026, 5, 18), "descricao": "MERCADO", "valor": Decimal("80.00"), "tipo": "D"},
+        ]
+
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        import io
+        dummy_file = io.BytesIO(b"dummy pdf content")
+        dummy_file.name = "test_fatura.pdf"
+        response = self.client.post(
+            "/api/ferramentas/importar-extrato/",
+            {"arquivo": dummy_file, "cartao": str(self.cartao.uuid), "banco": "santander"},
+            format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["linhas_adicionadas"], 3)
+        faturas = Conta.objects.filter(
+            usuario=self.user, eh_fatura_cartao=True
+        ).order_by("data_prevista").values_list("data_prevista", "valor")
+        self.assertEqual(
+            list(faturas),
+            [(date(2026, 5, 25), Decimal("170.90")), (date(2026, 6, 25), Decimal("80.00"))],
+        )
+
+    @patch('core.services.extrato_parser.processar_pdf')
+    def test_upload_em_fatura_paga_herda_o_pagamento(self, mock_processar):
+        """Compras importadas para uma fatura já paga entram como pagas, como faria o save()."""
+        from core.services.fatura_service import obter_ou_criar_fatura
+
+        fatura = obter_ou_criar_fatura(self.user, self.cartao, date(2026, 5, 25))
+        Conta.objects.filter(pk=fatura.pk).update(
+            transacao_realizada=True, data_realizacao=date(2026, 5, 20)
+        )
+        mock_processar.return_value = [
+            {"data": date(2026, 5, 10), "descricao": "SPOTIFY", "valor": Decimal("20.90"), "tipo": "D"},
+            {"data": date(2026, 5, 12), "descricao": "KABUM-KABUM", "valor": Decimal("150.00"), "tipo": "D"},
+            {"data": date(2026, 5, 18), "descricao": "MERCADO", "valor": Decimal("80.00"), "tipo": "D"},
+        ]
+
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        import io
+        dummy_file = io.BytesIO(b"dummy pdf content")
+        dummy_file.name = "test_fatura.pdf"
+        response = self.client.post(
+            "/api/ferramentas/importar-extrato/",
+            {"arquivo": dummy_file, "cartao": str(self.cartao.uuid), "banco": "santander"},
+            format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        compras = dict(
+            Conta.objects.filter(usuario=self.user, eh_fatura_cartao=False)
+            .values_list("descricao", "data_realizacao")
+        )
+        self.assertEqual(compras, {
+            "SPOTIFY": date(2026, 5, 20),
+            "KABUM-KABUM": date(2026, 5, 20),
+            "MERCADO": None,
+        })
+        self.assertEqual(
+            set(Conta.objects.filter(usuario=self.user, eh_fatura_cartao=False, transacao_realizada=True)
+                .values_list("descricao", flat=True)),
+            {"SPOTIFY", "KABUM-KABUM"},
+        )
+
+    def test_conciliacao_importa_linhas_pendentes_selecionadas(self):
+        """Importa cada linha pendente uma vez; ids repetidos ou já processados são ignorados."""
+        extrato = ExtratoImportado.objects.create(
+            usuario=self.user, arquivo_nome="fatura.pdf", cartao=self.cartao,
+            data_vencimento=date(2026, 5, 25),
+        )
+        compra, estorno, ignorada = (
+            LinhaExtrato.objects.create(
+                extrato=extrato, data=data, descricao=descricao, valor=Decimal(valor), tipo=tipo, status=status_linha
+            )
+            for data, descricao, valor, tipo, status_linha in (
+                (date(2026, 5, 10), "SPOTIFY", "20.90", "D", "pendente"),
+                (date(2026, 5, 12), "ESTORNO", "5.00", "C", "pendente"),
+                (date(2026, 5, 13), "MERCADO", "80.00", "D", "ignorado"),
+            )
+        )
+        token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.post(
+            "/api/ferramentas/conciliacao/processar/",
+            {"acao": "importar", "extrato_id": extrato.id,
+             "linha_ids": [compra.id, str(compra.id), estorno.id, ignorada.id, 999999]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["importadas"], 2)
+        extrato.refresh_from_db()
+        self.assertEqual(extrato.linhas_importadas, 2)
+        compra.refresh_from_db()
+        self.assertEqual(compra.status, "importado")
+        self.assertEqual(
+            (compra.conta_vinculada.data_prevista, compra.conta_vinculada.transacao_realizada),
+            (date(2026, 5, 25), False),
+        )
+        estorno.refresh_from_db()
+        self.assertEqual(estorno.conta_vinculada.tipo, Conta.TIPO_RECEITA)
+        ignorada.refresh_from_db()
+        self.assertEqual((ignorada.status, ignorada.conta_vinculada), ("ignorado", None))
+        fatura = Conta.objects.get(
+            usuario=self.user, eh_fatura_cartao=True, data_prevista=date(2026, 5, 25)
+        )
+        self.assertEqual(fatura.valor, Decimal("20.90"))
+
+
+class ExtrairLinhaExtratoTestCase(unittest.TestCase):
+    """Leitura de uma linha de texto do parser genérico de extratos."""
+
+    def test_extrai_data_valor_e_descricao(self):
+        self.assertEqual(
+            _extrair_linha("12/05/2024 PIX RECEBIDO JOAO R$ 1.234,56"),
+            {"data": date(2024, 5, 12), "descricao": "PIX RECEBIDO JOAO", "valor": Decimal("1234.56"), "tipo": "C"},
+        )
+        self.assertEqual(
+            _extrair_linha("05-03-2023 Compra mercado -45,90"),
+            {"data": date(2023, 3, 5), "descricao": "Compra mercado", "valor": Decimal("45.90"), "tipo": "D"},
+        )
+
+    def test_valor_colado_a_data_nao_deixa_espaco_duplo(self):
+        linha = _extrair_linha("PIX 19/09/24 1,68 Padaria")
+        self.assertEqual(linha["descricao"], "PIX Padaria")
+
+    def test_ignora_linhas_sem_data_ou_valor(self):
+        self.assertIsNone(_extrair_linha("Saldo anterior 1.000,00"))
+        self.assertIsNone(_extrair_linha("Extrato de 01/05/2024"))
+        self.assertIsNone(_extrair_linha(""))
+
+    def test_data_repetida_convertida_uma_unica_vez(self):
+        _data_extrato.cache_clear()
+        for descricao in ("Padaria", "Mercado", "Farmácia"):
+            self.assertEqual(_extrair_linha(f"19/09/24 {descricao} 1,68")["data"], date(2024, 9, 19))
+        self.assertIsNone(_extrair_linha("31/02/2024 Data inválida 1,68"))
+        info = _data_extrato.cache_info()
+        self.assertEqual((info.misses, info.hits), (2, 2))
+
+
+class LayoutColunasTestCase(unittest.TestCase):
+    """Leitura das linhas do parser de layout em colunas."""
+
+    def test_extrai_apenas_linhas_com_data_e_valor(self):
+        textos = [
+            "Vencimento 10/02/2025\nResumo da fatura\nTotal R$ 1.234,56\n"
+            "1 05/01 PADARIA CENTRAL R$ 12,50\n15/01 POSTO SHELL 200,00\nPagina 1/2"
+        ]
+
+        linhas = parse_layout_colunas("ignorado.pdf", textos)
+
+        self.assertEqual(
+            [(l["data"], l["descricao"], l["valor"]) for l in linhas],
+            [
+                (date(2025, 1, 5), "PADARIA CENTRAL", Decimal("12.50")),
+                (date(2025, 1, 15), "POSTO SHELL", Decimal("200.00")),
+            ],
+        )
+
+
+class NubankTestCase(unittest.TestCase):
+    """Leitura das linhas do parser de faturas do Nubank."""
+
+    def test_mes_abreviado_em_qualquer_caixa(self):
+        textos = ["20 MAI - PADARIA - 12,50\n05 Jun - MERCADO - -45,90\n01 jUl - POSTO - 100,00"]
+
+        linhas = parse_pdf_nubank("ignorado.pdf", textos)
+
+        ano = date.today().year
+        self.assertEqual(
+            [(l["data"], l["valor"], l["tipo"]) for l in linhas],
+            [
+                (date(ano, 5, 20), Decimal("12.50"), "C"),
+                (date(ano, 6, 5), Decimal("45.90"), "D"),
+                (date(ano, 7, 1), Decimal("100.00"), "C"),
+            ],
+        )
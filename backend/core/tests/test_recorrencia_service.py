@@ -15,6 +15,7 @@ from django.test import TestCase
 
 from core.models import Categoria, Conta, ReceitaRecorrente
 from core.services.recorrencia_service import (
+    _datas_ate,
     gerar_ocorrencias,
     criar_regra_e_gerar,
     estender_horizonte_se_necessario,
@@ -50,6 +51,35 @@ class RecorrenciaServiceTests(TestCase):
         self.assertEqual(criadas_2, 0)
         self.assertEqual(Conta.objects.filter(receita_recorrente=regra).count(), 4)
 
+    def test_geracao_em_lote_com_consultas_constantes(self):
+        regra = self._criar_regra(frequencia="semanal", data_inicio=date(2026, 1, 5))
+
+        # MAX + datas existentes + INSERT + timestamp de configuração, qualquer que
+        # seja o número de semanas geradas
+        with self.assertNumQueries(5):
+            criadas = gerar_ocorrencias(regra, date(2026, 12, 28))
+
+        self.assertEqual(criadas, 52)
+        self.assertEqual(
+            Conta.objects.filter(
+                receita_recorrente=regra, usuario=self.user, tipo=Conta.TIPO_RECEITA,
+                categoria=self.categoria, valor=Decimal("5000.00"),
+            ).count(),
+            52,
+        )
+
+    def test_datas_de_passo_fixo_iguais_ao_encadeamento(self):
+        inicio = date(2026, 1, 7)
+        for frequencia, dias in (("semanal", 7), ("quinzenal", 14)):
+            esperado = []
+            data = inicio
+            while data <= date(2026, 12, 31):
+                esperado.append(data)
+                data += relativedelta(days=dias)
+            self.assertEqual(_datas_ate(inicio, date(2026, 12, 31), frequencia), esperado)
+            self.assertEqual(_datas_ate(inicio, inicio, frequencia), [inicio])
+            self.assertEqual(_datas_ate(inicio, date(2026, 1, 6), frequencia), [])
+
     def test_dia_31_cai_em_fevereiro_curto(self):
         regra = self._criar_regra(data_inicio=date(2026, 1, 31))
         gerar_ocorrencias(regra, date(2026, 3, 31))
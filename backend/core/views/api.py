@@ -11,6 +11,7 @@ from datetime import date
 from decimal import Decimal, InvalidOperation
 from dateutil.relativedelta import relativedelta
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Sum, Q, F, Value
 from django.db.models.functions import Coalesce, Greatest
@@ -46,6 +47,10 @@ from core.services.dashboard_helper import (
     make_periodo_custom
 )
 
+# Constantes do cadastro em lote, criadas uma vez em vez de a cada item
+_CENTAVOS = Decimal("0.01")
+_FORMATOS_DATA_LOTE = ("%Y-%m-%d", "%d/%m/%Y")
+
 class CategoriaViewSet(viewsets.ModelViewSet):
     """ViewSet REST para operações de CRUD de Categoria financeira do usuário.
 
@@ -699,6 +704,8 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
         Returns:
             Response: Confirmação do total de despesas criadas ou lista detalhada de erros.
         """
+        from datetime import datetime
+
         usuario = request.user
         itens = request.data.get('itens', [])
         todas_pagas = request.data.get('todas_pagas', False)
@@ -706,22 +713,21 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
         if not isinstance(itens, list) or not itens:
             return Response({"detail": "Uma lista de itens é necessária."}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Find default expense category
+        # Categoria de despesa padrão (ou, na falta dela, a primeira por nome)
+        # resolvida em uma única consulta
         default_cat = Categoria.objects.filter(
-            usuario=usuario, tipo=Categoria.TIPO_DESPESA, is_default=True
-        ).first()
-        
-        if not default_cat:
-            default_cat = Categoria.objects.filter(
-                usuario=usuario, tipo=Categoria.TIPO_DESPESA
-            ).first()
+            usuario=usuario, tipo=Categoria.TIPO_DESPESA
+        ).order_by('-is_default', 'nome').first()
             
         contas_para_criar = []
+        categoria_por_conta = []  # nome da categoria personalizada de cada conta (ou None)
         erros = []
         
         for idx, item in enumerate(itens, 1):
+            # Cada célula é normalizada uma única vez no início da linha
             desc = item.get('descricao', '').strip()
             val_raw = item.get('valor')
+            val_str = '' if val_raw is None else str(val_raw).strip()
             dt_raw = item.get('data_vencimento', '').strip()
             
             # Skip completely empty lines
@@ -731,7 +737,7 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
             if not desc:
                 erros.append(f"Linha {idx}: Descrição é obrigatória.")
                 continue
-            if val_raw is None or str(val_raw).strip() == '':
+            if not val_str:
                 erros.append(f"Linha {idx}: Valor é obrigatório.")
                 continue
             if not dt_raw:
@@ -739,9 +745,17 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                 continue
                 
             try:
-                # Parse valor
-                val_str = str(val_raw).replace('.', '').replace(',', '.') if ',' in str(val_raw) else str(val_raw)
-                valor = Decimal(val_str).quantize(Decimal("0.01"))
+                # Parse valor. Inteiros do JSON viram Decimal direto; floats passam
+                # pelo texto (repr), que é a representação decimal mais curta e
+                # não carrega o erro binário de Decimal(float). "1.234,56" é
+                # normalizado para "1234.56"
+                if type(val_raw) is int:
+                    valor = Decimal(val_raw)
+                else:
+                    if ',' in val_str:
+                        val_str = val_str.replace('.', '').replace(',', '.')
+                    valor = Decimal(val_str)
+                valor = valor.quantize(_CENTAVOS)
                 if valor <= 0:
                     erros.append(f"Linha {idx}: Valor deve ser maior que zero.")
                     continue
@@ -751,9 +765,8 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                 
             try:
                 # Parse date
-                from datetime import datetime
                 data_parsed = None
-                for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+                for fmt in _FORMATOS_DATA_LOTE:
                     try:
                         data_parsed = datetime.strptime(dt_raw, fmt).date()
                         break
@@ -766,16 +779,11 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                 erros.append(f"Linha {idx}: Data inválida.")
                 continue
                 
-            # If the item specifies a custom category name, let's create/fetch it
+            # Categorias personalizadas só são buscadas/criadas na gravação, depois
+            # que todo o lote foi validado
             cat_nome = item.get('categoria', '').strip()
-            if cat_nome:
-                categoria_obj, _ = Categoria.objects.get_or_create(
-                    usuario=usuario,
-                    nome=cat_nome,
-                    tipo=Categoria.TIPO_DESPESA
-                )
-            else:
-                categoria_obj = default_cat
+            categoria_por_conta.append(cat_nome or None)
+            categoria_obj = None if cat_nome else default_cat
                 
             contas_para_criar.append(
                 Conta(
@@ -796,8 +804,26 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
         if not contas_para_criar:
             return Response({"detail": "Nenhum lançamento preenchido."}, status=status.HTTP_400_BAD_REQUEST)
             
+        # Só a gravação fica na transação: a validação acima não escreve nada
         with transaction.atomic():
-            Conta.objects.bulk_create(contas_para_criar)
+            # Só as categorias citadas no lote, e só as colunas usadas no vínculo
+            nomes = {nome for nome in categoria_por_conta if nome}
+            categorias = {
+                c.nome: c
+                for c in Categoria.objects.filter(
+                    usuario=usuario, nome__in=nomes, tipo=Categoria.TIPO_DESPESA
+                ).only('id', 'nome')
+            } if nomes else {}
+            for nome in sorted(nomes - categorias.keys()):
+                categorias[nome] = Categoria.objects.create(
+                    usuario=usuario, nome=nome, tipo=Categoria.TIPO_DESPESA
+                )
+            for conta, nome in zip(contas_para_criar, categoria_por_conta):
+                if nome:
+                    conta.categoria = categorias[nome]
+            Conta.objects.bulk_create(
+                contas_para_criar, batch_size=settings.FREECASH_BULK_BATCH_SIZE
+            )
             
         return Response({"msg": f"{len(contas_para_criar)} contas registradas com sucesso!"}, status=status.HTTP_201_CREATED)
 
@@ -1319,23 +1345,20 @@ class RelatoriosDREAPIView(APIView):
             except ValueError:
                 ano = timezone.localdate().year
 
-        # Receitas
-        receitas_qs = Conta.objects.filter(
+        # Receitas e despesas (fixas e de cartão) somadas em uma única varredura
+        # das contas do ano, com um agregado condicional por linha da DRE
+        despesa = Q(tipo=Conta.TIPO_DESPESA, eh_fatura_cartao=False)
+        totais = Conta.objects.filter(
             usuario=usuario,
-            tipo=Conta.TIPO_RECEITA,
             data_prevista__year=ano
+        ).aggregate(
+            receitas=Sum('valor', filter=Q(tipo=Conta.TIPO_RECEITA)),
+            fixas=Sum('valor', filter=despesa & Q(cartao__isnull=True)),
+            variaveis=Sum('valor', filter=despesa & Q(cartao__isnull=False)),
         )
-        total_receitas = receitas_qs.aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-
-        # Despesas
-        despesas_qs = Conta.objects.filter(
-            usuario=usuario,
-            tipo=Conta.TIPO_DESPESA,
-            data_prevista__year=ano,
-            eh_fatura_cartao=False
-        )
-        despesas_fixas = despesas_qs.filter(cartao__isnull=True).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
-        despesas_variaveis = despesas_qs.filter(cartao__isnull=False).aggregate(total=Sum('valor'))['total'] or Decimal('0.00')
+        total_receitas = totais['receitas'] or Decimal('0.00')
+        despesas_fixas = totais['fixas'] or Decimal('0.00')
+        despesas_variaveis = totais['variaveis'] or Decimal('0.00')
 
         # Investimentos (Dividendos / Rentabilidade)
         dividendos = Decimal('0.00')
@@ -1360,12 +1383,14 @@ class RelatoriosDREAPIView(APIView):
         hoje_dt = timezone.localdate()
         seis_meses_atras = hoje_dt - datetime.timedelta(days=180)
         
+        # Cada célula do mapa corresponde a um único dia: a soma por dia é feita no
+        # banco e só os totais diários (no máximo 181 linhas) chegam ao Python
         gastos_qs = Conta.objects.filter(
             usuario=usuario,
             tipo=Conta.TIPO_DESPESA,
             data_prevista__gte=seis_meses_atras,
             data_prevista__lte=hoje_dt
-        )
+        ).values_list('data_prevista').annotate(total=Sum('valor')).order_by()
         
         dias_semana_nomes = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
         grid = {d: [0.0] * 26 for d in range(7)}
@@ -1374,13 +1399,12 @@ class RelatoriosDREAPIView(APIView):
             semana_inicio = seis_meses_atras + datetime.timedelta(weeks=w)
             semana_labels.append(semana_inicio.strftime("%d/%m"))
             
-        for gasto in gastos_qs:
-            dt_gasto = gasto.data_prevista
+        for dt_gasto, total_dia in gastos_qs:
             dias_diff = (dt_gasto - seis_meses_atras).days
             week_idx = dias_diff // 7
             if 0 <= week_idx < 26:
                 day_idx = dt_gasto.weekday()
-                grid[day_idx][week_idx] += float(gasto.valor)
+                grid[day_idx][week_idx] += float(total_dia)
                 
         heatmap_series = []
         for d in range(7):
@@ -1434,7 +1458,6 @@ class ExecutiveBIDashboardAPIView(APIView):
         Returns:
             Response: Dicionário contendo labels de meses, séries de liquidez, custódia, DRE e KPIs.
         """
-        from datetime import datetime
         from investimento.services.carteira_historico_service import CarteiraHistoricoService
         usuario = request.user
         
@@ -1481,13 +1504,15 @@ class ExecutiveBIDashboardAPIView(APIView):
             "", "Jan", "Fev", "Mar", "Abr", "Mai", "Jun", 
             "Jul", "Ago", "Set", "Out", "Nov", "Dez"
         ]
-        
+
+        # Data e rótulo (ex: "Set/25") de cada mês da série convertidos uma única
+        # vez e reaproveitados pelos dois laços abaixo
+        meses_serie = []
         for item in series_inv:
-            dt_str = item["data"]
-            dt = datetime.strptime(dt_str, "%Y-%m-%d").date()
-            
-            # Label ex: "Set/25"
-            label = f"{meses_nomes_pt[dt.month]}/{str(dt.year)[2:]}"
+            dt = date.fromisoformat(item["data"])
+            meses_serie.append((item, dt, f"{meses_nomes_pt[dt.month]}/{str(dt.year)[2:]}"))
+        
+        for item, dt, label in meses_serie:
             meses_labels.append(label)
             
             # Custódia (Investimento a mercado)
@@ -1519,11 +1544,7 @@ class ExecutiveBIDashboardAPIView(APIView):
         # DRE resumida e aportes dos últimos 12 meses
         tabela_dre = []
         proventos_acumulados_series = []
-        for item in series_inv:
-            dt_str = item["data"]
-            dt = datetime.strptime(dt_str, "%Y-%m-%d").date()
-            label = f"{meses_nomes_pt[dt.month]}/{str(dt.year)[2:]}"
-            
+        for _, dt, label in meses_serie:
             # Receitas e Despesas ocorridas DE FATO dentro deste mês
             contas_mes = Conta.objects.filter(
                 usuario=usuario,
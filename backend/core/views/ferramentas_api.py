@@ -12,9 +12,9 @@ Endpoints expostos:
 
 import csv
 import io
-import tempfile
-import os
 
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.http import HttpResponse
 from rest_framework import permissions, status, viewsets
@@ -31,6 +31,9 @@ from core.serializers import (
     LinhaExtratoSerializer,
 )
 
+# Tamanho dos lotes de INSERT ao gravar as compras de uma fatura importada
+_LOTE_IMPORTACAO = settings.FREECASH_BULK_BATCH_SIZE
+
 
 # ─────────────────────────────────────────────────────────────
 # 2.1  IMPORTAR — POST /api/ferramentas/importar/
@@ -122,16 +125,13 @@ class FerramentasImportarExtratoAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        suffix = os.path.splitext(arquivo.name)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            for chunk in arquivo.chunks():
-                temp_file.write(chunk)
-            temp_path = temp_file.name
-
         try:
             from core.services.extrato_parser import processar_pdf
             from core.services.fatura_service import detectar_vencimento_fatura
-            linhas_extraidas = processar_pdf(temp_path, banco=banco)
+            # O pdfplumber lê direto do arquivo enviado (em memória ou no temporário
+            # do próprio Django), sem copiá-lo para um segundo arquivo em disco
+            arquivo.seek(0)
+            linhas_extraidas = processar_pdf(arquivo, banco=banco)
 
             if not linhas_extraidas:
                 return Response(
@@ -142,7 +142,7 @@ class FerramentasImportarExtratoAPIView(APIView):
             # Detectar data de vencimento da fatura
             data_vencimento_fatura = detectar_vencimento_fatura(linhas_extraidas, cartao_obj)
 
-            count = 0
+            lancamentos = []
             for line in linhas_extraidas:
                 tipo_conta = 'R' if line.get('tipo', 'D') == 'C' else 'D'
                 transacao_realizada = True
@@ -162,19 +162,28 @@ class FerramentasImportarExtratoAPIView(APIView):
                     if data_vencimento_fatura and data_prevista < data_vencimento_fatura:
                         data_prevista = data_vencimento_fatura
 
-                # Verificar se já existe a transação no banco
-                exists = Conta.objects.filter(
+                lancamentos.append((line, tipo_conta, transacao_realizada, data_prevista, data_compra))
+
+            # Chaves dos lançamentos já existentes, lidas em uma única consulta em
+            # vez de um exists() por linha. O filtro se restringe às datas e
+            # valores presentes no arquivo, não a todo o histórico do cartão
+            existentes = set(
+                Conta.objects.filter(
                     usuario=request.user,
-                    tipo=tipo_conta,
-                    descricao=line['descricao'],
-                    valor=line['valor'],
                     cartao=cartao_obj,
-                    data_compra=data_compra,
-                    data_prevista=data_prevista
-                ).exists()
+                    data_prevista__in={lanc[3] for lanc in lancamentos},
+                    valor__in={lanc[0]['valor'] for lanc in lancamentos},
+                ).values_list('tipo', 'descricao', 'valor', 'data_compra', 'data_prevista')
+            )
 
-                if not exists:
-                    Conta.objects.create(
+            novas = []
+            for line, tipo_conta, transacao_realizada, data_prevista, data_compra in lancamentos:
+                # Verificar se já existe a transação no banco (ou repetida no próprio arquivo)
+                chave = (tipo_conta, line['descricao'], line['valor'], data_compra, data_prevista)
+
+                if chave not in existentes:
+                    existentes.add(chave)
+                    novas.append(Conta(
                         usuario=request.user,
                         tipo=tipo_conta,
                         descricao=line['descricao'],
@@ -184,8 +193,44 @@ class FerramentasImportarExtratoAPIView(APIView):
                         data_realizacao=line['data'] if transacao_realizada else None,
                         cartao=cartao_obj,
                         data_compra=data_compra,
-                    )
-                    count += 1
+                    ))
+
+            if novas:
+                from core.services.fatura_service import atualizar_valor_fatura, obter_ou_criar_fatura
+                from core.signals import atualizar_config
+
+                # O bulk_create não passa pelo Conta.save(), que alinha cada compra
+                # nova ao estado da fatura consolidada do mesmo vencimento (paga ou
+                # pendente). O alinhamento é feito aqui, com as faturas de todos os
+                # vencimentos lidas em uma única consulta
+                if cartao_obj:
+                    estado_faturas = {}
+                    for vencimento, realizada, data_realizacao in Conta.objects.filter(
+                        usuario=request.user,
+                        cartao=cartao_obj,
+                        eh_fatura_cartao=True,
+                        data_prevista__in={conta.data_prevista for conta in novas},
+                    ).values_list('data_prevista', 'transacao_realizada', 'data_realizacao'):
+                        # Mesma fatura que o .first() do save() escolheria
+                        estado_faturas.setdefault(
+                            vencimento, (realizada, data_realizacao if realizada else None)
+                        )
+                    for conta in novas:
+                        estado = estado_faturas.get(conta.data_prevista)
+                        if estado:
+                            conta.transacao_realizada, conta.data_realizacao = estado
+
+                # As compras são gravadas em lotes; como o bulk_create não dispara
+                # post_save, a fatura de cada vencimento é consolidada uma única vez
+                # ao final, em vez de ser recalculada a cada compra
+                with transaction.atomic():
+                    Conta.objects.bulk_create(novas, batch_size=_LOTE_IMPORTACAO)
+                    for vencimento in dict.fromkeys(conta.data_prevista for conta in novas):
+                        atualizar_valor_fatura(
+                            obter_ou_criar_fatura(request.user, cartao_obj, vencimento)
+                        )
+                    atualizar_config(request.user)
+            count = len(novas)
 
             return Response(
                 {
@@ -202,9 +247,6 @@ class FerramentasImportarExtratoAPIView(APIView):
                 {'erro': f'Falha ao processar fatura: {str(e)}'},
                 status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -284,32 +326,47 @@ class FerramentasConciliacaoProcessarAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        count = 0
         if acao == 'importar':
-            for linha_id in linha_ids:
-                try:
-                    linha = LinhaExtrato.objects.get(
-                        pk=linha_id, extrato=extrato, status='pendente'
-                    )
+            from core.services.fatura_service import calcular_vencimento_fatura
+
+            # Linhas pendentes selecionadas lidas em uma única consulta, em vez de um
+            # get() por id. Ids inexistentes, de outro extrato ou já processados
+            # (inclusive repetidos na própria requisição) são ignorados
+            pendentes = {
+                str(pk): linha
+                for pk, linha in LinhaExtrato.objects.filter(
+                    pk__in=linha_ids, extrato=extrato, status='pendente'
+                ).in_bulk().items()
+            }
+            cartao = extrato.cartao
+            agora = timezone.now()
+
+            importadas = []
+            with transaction.atomic():
+                for linha_id in linha_ids:
+                    linha = pendentes.pop(str(linha_id), None)
+                    if linha is None:
+                        continue
+
                     tipo_conta = 'R' if linha.tipo == 'C' else 'D'
                     transacao_realizada = True
                     data_prevista = linha.data
                     data_compra = None
 
-                    if extrato.cartao and tipo_conta == 'D':
-                        from core.services.fatura_service import calcular_vencimento_fatura
+                    if cartao and tipo_conta == 'D':
                         transacao_realizada = False
                         data_compra = linha.data
                         data_prevista = calcular_vencimento_fatura(
                             data_compra,
-                            extrato.cartao.dia_fechamento,
-                            extrato.cartao.dia_vencimento
+                            cartao.dia_fechamento,
+                            cartao.dia_vencimento
                         )
                         # Ajustar data_prevista para a data da fatura atual caso seja uma parcela antiga
                         if extrato.data_vencimento and data_prevista < extrato.data_vencimento:
                             data_prevista = extrato.data_vencimento
 
-                    conta = Conta.objects.create(
+                    # create() individual: o post_save da Conta consolida a fatura do cartão
+                    linha.conta_vinculada = Conta.objects.create(
                         usuario=request.user,
                         tipo=tipo_conta,
                         descricao=linha.descricao,
@@ -317,18 +374,19 @@ class FerramentasConciliacaoProcessarAPIView(APIView):
                         data_prevista=data_prevista,
                         transacao_realizada=transacao_realizada,
                         data_realizacao=linha.data if transacao_realizada else None,
-                        cartao=extrato.cartao,
+                        cartao=cartao,
                         data_compra=data_compra,
                     )
                     linha.status = 'importado'
-                    linha.conta_vinculada = conta
-                    linha.save()
-                    count += 1
-                except LinhaExtrato.DoesNotExist:
-                    continue
-
-            extrato.linhas_importadas += count
-            extrato.save(update_fields=['linhas_importadas'])
+                    linha.atualizada_em = agora
+                    importadas.append(linha)
+
+                LinhaExtrato.objects.bulk_update(
+                    importadas, ['status', 'conta_vinculada', 'atualizada_em']
+                )
+                count = len(importadas)
+                extrato.linhas_importadas += count
+                extrato.save(update_fields=['linhas_importadas'])
             return Response(
                 {'ok': True, 'importadas': count},
                 status=status.HTTP_200_OK
@@ -375,7 +433,11 @@ class FerramentasExportarAPIView(APIView):
         formato = request.query_params.get('formato', 'excel')
         escopo = request.query_params.get('escopo', 'completo')
         usuario = request.user
-        agora = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+        # Um único instante para o nome do arquivo, a data padrão e o registro do export
+        momento = timezone.now()
+        agora = timezone.localtime(momento).strftime('%Y%m%d_%H%M%S')
+        hoje = timezone.localdate(momento)
+        username = usuario.username
 
         # Parse de datas
         from datetime import datetime, date
@@ -394,9 +456,9 @@ class FerramentasExportarAPIView(APIView):
             try:
                 data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
             except ValueError:
-                data_fim = timezone.localdate()
+                data_fim = hoje
         else:
-            data_fim = timezone.localdate()
+            data_fim = hoje
 
         if formato == 'fcbk':
             senha = request.query_params.get('senha', '')
@@ -405,31 +467,33 @@ class FerramentasExportarAPIView(APIView):
                     {'erro': 'O parâmetro "senha" é obrigatório para gerar o backup .fcbk.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            from core.services.export_service import export_user_data
-            payload = export_user_data(usuario, senha)
-            filename = f'backup_freecash_{usuario.username}_{agora}.fcbk'
-            response = HttpResponse(payload, content_type='application/octet-stream')
+            from core.services.export_service import escrever_backup
+            filename = f'backup_freecash_{username}_{agora}.fcbk'
+            response = HttpResponse(content_type='application/octet-stream')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            # O Base64 é gravado em blocos direto na resposta
+            escrever_backup(response, usuario, senha)
 
-            config, _ = ConfigUsuario.objects.get_or_create(usuario=usuario)
-            config.ultimo_export_em = timezone.now()
-            config.save(update_fields=['ultimo_export_em'])
+            # Um único UPDATE; a configuração só é criada se o usuário ainda não tiver uma
+            if not ConfigUsuario.objects.filter(usuario=usuario).update(ultimo_export_em=momento):
+                ConfigUsuario.objects.create(usuario=usuario, ultimo_export_em=momento)
             return response
 
         elif formato == 'excel':
-            from core.services.export_report_service import gerar_excel
-            payload = gerar_excel(usuario, data_inicio, data_fim, escopo)
-            filename = f'relatorio_financeiro_{usuario.username}_{agora}.xlsx'
-            response = HttpResponse(payload, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            from core.services.export_report_service import escrever_excel
+            filename = f'relatorio_financeiro_{username}_{agora}.xlsx'
+            response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            # A planilha é gravada direto na resposta, sem buffer intermediário
+            escrever_excel(response, usuario, data_inicio, data_fim, escopo)
             return response
 
         elif formato == 'pdf':
-            from core.services.export_report_service import gerar_pdf
-            payload = gerar_pdf(usuario, data_inicio, data_fim, escopo)
-            filename = f'relatorio_financeiro_{usuario.username}_{agora}.pdf'
-            response = HttpResponse(payload, content_type='application/pdf')
+            from core.services.export_report_service import escrever_pdf
+            filename = f'relatorio_financeiro_{username}_{agora}.pdf'
+            response = HttpResponse(content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            escrever_pdf(response, usuario, data_inicio, data_fim, escopo)
             return response
 
         elif formato == 'csv':
@@ -441,15 +505,19 @@ class FerramentasExportarAPIView(APIView):
                 if escopo == 'completo':
                     writer.writerow(['--- MOVIMENTACOES GERAIS ---'])
                 writer.writerow(['Data', 'Tipo', 'Descricao', 'Categoria', 'Valor (R$)', 'Status'])
-                contas = get_movimentacoes(usuario, data_inicio, data_fim)
-                for c in contas:
+                # Tuplas em vez de instâncias de Conta: só as colunas escritas no CSV
+                tipos = dict(Conta.TIPO_CHOICES)
+                contas = get_movimentacoes(usuario, data_inicio, data_fim).values_list(
+                    'data_prevista', 'tipo', 'descricao', 'categoria__nome', 'valor', 'transacao_realizada',
+                ).iterator(chunk_size=2000)
+                for data_prevista, tipo, descricao, categoria, valor, realizada in contas:
                     writer.writerow([
-                        c.data_prevista.strftime('%d/%m/%Y'),
-                        c.get_tipo_display(),
-                        c.descricao,
-                        c.categoria.nome if c.categoria else 'Sem cat.',
-                        str(c.valor),
-                        'Realizada' if c.transacao_realizada else 'Pendente',
+                        data_prevista.strftime('%d/%m/%Y'),
+                        tipos.get(tipo, tipo),
+                        descricao,
+                        categoria if categoria is not None else 'Sem cat.',
+                        str(valor),
+                        'Realizada' if realizada else 'Pendente',
                     ])
 
             if escopo == 'completo':
@@ -474,7 +542,7 @@ class FerramentasExportarAPIView(APIView):
                         str(a.valor_total_atual - a.valor_investido),
                     ])
 
-            filename = f'relatorio_financeiro_{usuario.username}_{agora}.csv'
+            filename = f'relatorio_financeiro_{username}_{agora}.csv'
             response = HttpResponse(output.getvalue(), content_type='text/csv; charset=utf-8')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
             return response
@@ -160,6 +160,12 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_CREDENTIALS = True
 
+# Linhas por INSERT/UPDATE nas gravações em lote (bulk_create/bulk_update) de
+# importações, restaurações de backup e histórico da carteira. Lotes maiores
+# reduzem as idas ao banco; o teto de 3000 mantém o modelo mais largo (17
+# colunas) abaixo do limite de 65535 parâmetros por consulta do PostgreSQL.
+FREECASH_BULK_BATCH_SIZE = max(1, min(int(os.getenv("FREECASH_BULK_BATCH_SIZE", "1000")), 3000))
+
 # REST Framework & JWT Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -6,6 +6,8 @@ de cotações a mercado integrando com coletores remotos.
 """
 
 from decimal import Decimal
+from itertools import groupby
+
 from investimento.models import Ativo, Transacao, Cotacao
 from investimento.services.tradingview_screener import (
     fetch_quotes_brazil,
@@ -14,8 +16,8 @@ from investimento.services.tradingview_screener import (
 from investimento.services.cvm_service import fetch_cvm_quotes
 
 
-def recalcular_ativo(ativo: Ativo) -> None:
-    """Recalcula o preço médio ponderado fiscal e a quantidade em custódia do ativo.
+def _calcular_posicao(ativo: Ativo, transacoes) -> None:
+    """Aplica ao ativo (sem salvar) a quantidade e o PM resultantes das transações.
 
     Varre de forma ordenada o histórico completo de transações do ativo na carteira,
     acrescendo quantidades nas compras e computando PM proporcional, e amortizando
@@ -23,9 +25,8 @@ def recalcular_ativo(ativo: Ativo) -> None:
 
     Args:
         ativo (Ativo): Instância do ativo custodiado a ser recalculado.
+        transacoes (Iterable[Transacao]): Transações do ativo ordenadas por data e criação.
     """
-    transacoes = ativo.transacoes.order_by("data", "criada_em")
-
     quantidade_total = Decimal(0)
     custo_total = Decimal(0)
 
@@ -65,9 +66,44 @@ def recalcular_ativo(ativo: Ativo) -> None:
         quantidade_total = Decimal(0)  # evita -0.000...
 
     ativo.quantidade = quantidade_total
+
+
+def recalcular_ativo(ativo: Ativo) -> None:
+    """Recalcula o preço médio ponderado fiscal e a quantidade em custódia do ativo.
+
+    Args:
+        ativo (Ativo): Instância do ativo custodiado a ser recalculado.
+    """
+    _calcular_posicao(ativo, ativo.transacoes.order_by("data", "criada_em"))
     ativo.save(update_fields=["quantidade", "preco_medio"])
 
 
+def recalcular_ativos(ativos) -> None:
+    """Recalcula em lote a quantidade e o PM de vários ativos.
+
+    Mesma regra de `recalcular_ativo`, mas as transações de todos os ativos vêm em
+    uma única consulta e as posições são gravadas com um `bulk_update`, em vez de
+    uma leitura e um `save` por ativo (ex.: após restaurar um backup).
+
+    Args:
+        ativos (Iterable[Ativo]): Ativos a recalcular.
+    """
+    por_id = {ativo.pk: ativo for ativo in ativos}
+    if not por_id:
+        return
+
+    transacoes = Transacao.objects.filter(ativo_id__in=por_id).order_by(
+        "ativo_id", "data", "criada_em"
+    ).only("ativo_id", "tipo", "quantidade", "valor_total")
+    for ativo in por_id.values():
+        # Ativos sem transações também são zerados
+        _calcular_posicao(ativo, ())
+    for ativo_id, itens in groupby(transacoes.iterator(chunk_size=2000), key=lambda t: t.ativo_id):
+        _calcular_posicao(por_id[ativo_id], itens)
+
+    Ativo.objects.bulk_update(por_id.values(), ["quantidade", "preco_medio"], batch_size=500)
+
+
 def atualizar_cotacoes() -> tuple[int, list[str]]:
     """Busca em lote as cotações atuais de mercado (B3 via TradingView e Fundos via CVM).
 
@@ -80,19 +116,22 @@ def atualizar_cotacoes() -> tuple[int, list[str]]:
     errors = []
 
     # 1. Atualização de Ações / FIIs via TradingView
-    ativos_b3 = Ativo.objects.filter(ativo=True).exclude(ticker="")
+    ativos_b3 = list(Ativo.objects.filter(ativo=True).exclude(ticker=""))
+    # Símbolo normalizado (strip/upper/prefixo) de cada ativo calculado uma única
+    # vez e reaproveitado na busca, na gravação e no filtro dos fundos da CVM
+    simbolos = {a.pk: _normalize_to_tradingview_symbol(a.ticker) for a in ativos_b3}
 
     quotes_by_symbol = {}
-    if ativos_b3.exists():
+    if ativos_b3:
         try:
-            tickers = [a.ticker for a in ativos_b3 if a.ticker]
-            quotes_by_symbol = fetch_quotes_brazil(tickers)
+            # A normalização é idempotente, então os símbolos já prontos são aceitos
+            quotes_by_symbol = fetch_quotes_brazil(s for s in simbolos.values() if s)
         except Exception as e:
             errors.append(f"Erro ao buscar cotações no TradingView: {str(e)}")
 
     for ativo in ativos_b3:
         try:
-            symbol = _normalize_to_tradingview_symbol(ativo.ticker)
+            symbol = simbolos[ativo.pk]
             quote = quotes_by_symbol.get(symbol)
             if not quote:
                 # Se não foi encontrado no TradingView mas possui CNPJ, tentaremos pela CVM abaixo
@@ -114,7 +153,7 @@ def atualizar_cotacoes() -> tuple[int, list[str]]:
     # Filtra ativos para buscar apenas se não foram atualizados pelo TradingView nesta rodada
     ativos_cvm_para_buscar = []
     for a in ativos_cvm:
-        symbol = _normalize_to_tradingview_symbol(a.ticker)
+        symbol = simbolos.get(a.pk) or _normalize_to_tradingview_symbol(a.ticker)
         if symbol not in quotes_by_symbol:
             ativos_cvm_para_buscar.append(a)
 
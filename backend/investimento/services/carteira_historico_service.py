@@ -12,11 +12,47 @@ from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce
 
 from investimento.models import Ativo, CarteiraHistorico, Cotacao, Transacao
 
+# Patrimônio convertido para float pelo banco em toda a coluna, em vez de um
+# float(x or 0) por linha no Python
+_PATRIMONIO_FLOAT = Cast(Coalesce(F("patrimonio"), Value(Decimal(0))), FloatField())
+
+
+def _ohlc_por_periodo(linhas, chave) -> list[tuple]:
+    """Agrupa snapshots ordenados por data em velas OHLC de patrimônio por período.
+
+    Args:
+        linhas: Tuplas (data, patrimônio, *extras) em ordem crescente de data.
+        chave: Função que mapeia a data para o período (ex: (ano, mês)).
+
+    Returns:
+        list[tuple]: Uma tupla (última data, [o, h, l, c], extras da última linha)
+        por período, em ordem cronológica.
+    """
+    periodos = []
+    atual = None
+    for data, patrimonio, *extras in linhas:
+        periodo = chave(data)
+        if atual is None or atual[0] != periodo:
+            atual = [periodo, data, patrimonio, patrimonio, patrimonio, patrimonio, extras]
+            periodos.append(atual)
+            continue
+        atual[1] = data
+        if patrimonio > atual[3]:
+            atual[3] = patrimonio
+        if patrimonio < atual[4]:
+            atual[4] = patrimonio
+        atual[5] = patrimonio
+        atual[6] = extras
+    return [(d, [o, h, l, c], extras) for _, d, o, h, l, c, extras in periodos]
+
 
 @dataclass(frozen=True)
 class HistoricoUpdateResult:
@@ -99,9 +135,13 @@ class CarteiraHistoricoService:
         quantities: dict[int, Decimal] = {}
         last_price: dict[int, Decimal] = {}
 
-        total_compras = Decimal(0)
-        total_vendas = Decimal(0)
-        total_dividendos = Decimal(0)
+        # Acumulados em centavos inteiros (valor_total tem 2 casas): a soma diária
+        # fica na aritmética de int, e o Decimal só é montado quando o total muda
+        compras_centavos = vendas_centavos = dividendos_centavos = 0
+
+        patrimonio = Decimal(0)
+        total_compras = total_vendas = total_dividendos = Decimal(0)
+        rentabilidade = rentabilidade_percentual = Decimal(0)
 
         to_create: list[CarteiraHistorico] = []
         to_update: list[CarteiraHistorico] = []
@@ -110,33 +150,43 @@ class CarteiraHistoricoService:
         one_day = timedelta(days=1)
 
         while cur <= end_date:
-            for ativo_id, valor in cotacoes_by_date.get(cur, []):
-                if valor is not None:
-                    last_price[ativo_id] = Decimal(valor)
-
-            for t in transacoes_by_date.get(cur, []):
-                if t.tipo == Transacao.TIPO_COMPRA:
-                    quantities[t.ativo_id] = quantities.get(t.ativo_id, Decimal(0)) + t.quantidade
-                    total_compras += t.valor_total or Decimal(0)
-                elif t.tipo == Transacao.TIPO_VENDA:
-                    quantities[t.ativo_id] = quantities.get(t.ativo_id, Decimal(0)) - t.quantidade
-                    total_vendas += t.valor_total or Decimal(0)
-                elif t.tipo == Transacao.TIPO_DIVIDENDO:
-                    total_dividendos += t.valor_total or Decimal(0)
-
-            patrimonio = Decimal(0)
-            for ativo_id, qtd in quantities.items():
-                if not qtd:
-                    continue
-                price = last_price.get(ativo_id)
-                if price is None:
-                    price = preco_medio_by_ativo.get(ativo_id, Decimal(0))
-                patrimonio += qtd * price
-
-            rentabilidade = (patrimonio + total_vendas + total_dividendos) - total_compras
-            rentabilidade_percentual = Decimal(0)
-            if total_compras > 0:
-                rentabilidade_percentual = (rentabilidade / total_compras) * Decimal(100)
+            cotacoes_dia = cotacoes_by_date.get(cur)
+            transacoes_dia = transacoes_by_date.get(cur)
+
+            # Dias sem cotação nem transação repetem o snapshot anterior: quantidades,
+            # preços e totais não mudam, então o patrimônio não é recalculado
+            if cotacoes_dia or transacoes_dia:
+                for ativo_id, valor in cotacoes_dia or ():
+                    if valor is not None:
+                        last_price[ativo_id] = Decimal(valor)
+
+                for t in transacoes_dia or ():
+                    if t.tipo == Transacao.TIPO_COMPRA:
+                        quantities[t.ativo_id] = quantities.get(t.ativo_id, Decimal(0)) + t.quantidade
+                        compras_centavos += int((t.valor_total or 0) * 100)
+                    elif t.tipo == Transacao.TIPO_VENDA:
+                        quantities[t.ativo_id] = quantities.get(t.ativo_id, Decimal(0)) - t.quantidade
+                        vendas_centavos += int((t.valor_total or 0) * 100)
+                    elif t.tipo == Transacao.TIPO_DIVIDENDO:
+                        dividendos_centavos += int((t.valor_total or 0) * 100)
+
+                total_compras = Decimal(compras_centavos).scaleb(-2)
+                total_vendas = Decimal(vendas_centavos).scaleb(-2)
+                total_dividendos = Decimal(dividendos_centavos).scaleb(-2)
+
+                patrimonio = Decimal(0)
+                for ativo_id, qtd in quantities.items():
+                    if not qtd:
+                        continue
+                    price = last_price.get(ativo_id)
+                    if price is None:
+                        price = preco_medio_by_ativo.get(ativo_id, Decimal(0))
+                    patrimonio += qtd * price
+
+                rentabilidade = (patrimonio + total_vendas + total_dividendos) - total_compras
+                rentabilidade_percentual = Decimal(0)
+                if compras_centavos > 0:
+                    rentabilidade_percentual = (rentabilidade / total_compras) * Decimal(100)
 
             obj = CarteiraHistorico(
                 usuario=self.user,
@@ -160,7 +210,9 @@ class CarteiraHistoricoService:
 
         with transaction.atomic():
             if to_create:
-                CarteiraHistorico.objects.bulk_create(to_create, batch_size=500)
+                CarteiraHistorico.objects.bulk_create(
+                    to_create, batch_size=settings.FREECASH_BULK_BATCH_SIZE
+                )
             if to_update:
                 CarteiraHistorico.objects.bulk_update(
                     to_update,
@@ -172,7 +224,7 @@ class CarteiraHistoricoService:
                         "rentabilidade",
                         "rentabilidade_percentual",
                     ],
-                    batch_size=500,
+                    batch_size=settings.FREECASH_BULK_BATCH_SIZE,
                 )
 
         return HistoricoUpdateResult(
@@ -193,44 +245,27 @@ class CarteiraHistoricoService:
         Returns:
             list[dict]: Lista de dicionários com 'data', 'ohlc' (lista de floats) e 'investido'.
         """
-        qs = CarteiraHistorico.objects.filter(usuario=self.user).order_by("data").values(
-            "data", "patrimonio", "total_compras", "total_vendas", "total_dividendos"
+        qs = CarteiraHistorico.objects.filter(usuario=self.user).order_by("data").values_list(
+            "data", _PATRIMONIO_FLOAT, "total_compras", "total_vendas", "total_dividendos"
         )
 
-        # Agrupar por (ano, mês)
-        groups: dict[tuple[int, int], list[dict]] = {}
-        for row in qs:
-            d: date = row["data"]
-            key = (d.year, d.month)
-            if key not in groups:
-                groups[key] = []
-            groups[key].append(row)
-
-        sorted_keys = sorted(groups.keys())
-        if meses and len(sorted_keys) > meses:
-            sorted_keys = sorted_keys[-meses:]
-
-        results = []
-        for key in sorted_keys:
-            rows = groups[key]
-            # OHLC do Patrimônio
-            o = float(rows[0]["patrimonio"] or 0)
-            c = float(rows[-1]["patrimonio"] or 0)
-            h = float(max(r["patrimonio"] or 0 for r in rows))
-            l = float(min(r["patrimonio"] or 0 for r in rows))
-            
-            # Investimento Líquido (Custo) no final do mês
-            investido = float((rows[-1]["total_compras"] or 0) - (rows[-1]["total_vendas"] or 0))
-            dividendos_acumulados = float(rows[-1]["total_dividendos"] or 0)
-
-            results.append({
-                "data": rows[-1]["data"].isoformat(),
-                "ohlc": [o, h, l, c],
-                "investido": investido,
-                "patrimonio": c,
-                "total_dividendos": dividendos_acumulados,
-            })
-        return results
+        # OHLC do patrimônio por (ano, mês); investimento líquido (custo) e
+        # dividendos acumulados vêm do último snapshot do mês e só são
+        # convertidos uma vez por período
+        periodos = _ohlc_por_periodo(qs, lambda d: (d.year, d.month))
+        if meses and len(periodos) > meses:
+            periodos = periodos[-meses:]
+
+        return [
+            {
+                "data": d.isoformat(),
+                "ohlc": ohlc,
+                "investido": float((compras or 0) - (vendas or 0)),
+                "patrimonio": ohlc[3],
+                "total_dividendos": float(dividendos or 0),
+            }
+            for d, ohlc, (compras, vendas, dividendos) in periodos
+        ]
 
     def series_anual(self, *, anos: int | None = 10) -> list[dict]:
         """Gera a série anual consolidada em formato OHLC de patrimônio e investimentos.
@@ -241,38 +276,23 @@ class CarteiraHistoricoService:
         Returns:
             list[dict]: Lista contendo dicionários com a evolução anual.
         """
-        qs = CarteiraHistorico.objects.filter(usuario=self.user).order_by("data").values(
-            "data", "patrimonio", "total_compras", "total_vendas"
+        qs = CarteiraHistorico.objects.filter(usuario=self.user).order_by("data").values_list(
+            "data", _PATRIMONIO_FLOAT, "total_compras", "total_vendas"
         )
 
-        groups: dict[int, list[dict]] = {}
-        for row in qs:
-            d: date = row["data"]
-            key = d.year
-            if key not in groups:
-                groups[key] = []
-            groups[key].append(row)
-
-        sorted_keys = sorted(groups.keys())
-        if anos and len(sorted_keys) > anos:
-            sorted_keys = sorted_keys[-anos:]
-
-        results = []
-        for key in sorted_keys:
-            rows = groups[key]
-            o = float(rows[0]["patrimonio"] or 0)
-            c = float(rows[-1]["patrimonio"] or 0)
-            h = float(max(r["patrimonio"] or 0 for r in rows))
-            l = float(min(r["patrimonio"] or 0 for r in rows))
-            investido = float((rows[-1]["total_compras"] or 0) - (rows[-1]["total_vendas"] or 0))
-
-            results.append({
-                "data": rows[-1]["data"].isoformat(),
-                "ohlc": [o, h, l, c],
-                "investido": investido,
-                "patrimonio": c,
-            })
-        return results
+        periodos = _ohlc_por_periodo(qs, lambda d: d.year)
+        if anos and len(periodos) > anos:
+            periodos = periodos[-anos:]
+
+        return [
+            {
+                "data": d.isoformat(),
+                "ohlc": ohlc,
+                "investido": float((compras or 0) - (vendas or 0)),
+                "patrimonio": ohlc[3],
+            }
+            for d, ohlc, (compras, vendas) in periodos
+        ]
 
     def obter_rentabilidade_mensal_por_ano(self) -> dict[int, dict[int, float]]:
         """Gera um dicionário mapeando ano -> {mes: rentabilidade_mensal_percentual}.
@@ -9,6 +9,8 @@ import urllib.request
 import zipfile
 import io
 import csv
+import shutil
+import tempfile
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Iterable
@@ -28,6 +30,54 @@ def format_cnpj(cnpj: str) -> str:
     return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
 
 
+def _cotacoes_do_csv(arquivo, cnpj_map: dict[str, str]) -> dict[str, tuple[Decimal, date]]:
+    """Extrai do CSV de informes diários a cotação mais recente de cada CNPJ buscado.
+
+    O arquivo mensal da CVM tem centenas de milhares de linhas, das quais só
+    algumas interessam. Por isso o cabeçalho é lido uma única vez para localizar
+    as colunas, e cada linha é lida como lista (sem montar um dict por linha como
+    o `csv.DictReader`), descartando cedo as de outros fundos.
+
+    Args:
+        arquivo: Arquivo binário do CSV (delimitado por ponto e vírgula).
+        cnpj_map (dict[str, str]): CNPJ formatado -> CNPJ limpo.
+
+    Returns:
+        dict[str, tuple[Decimal, date]]: CNPJ limpo -> (Cotação, Data do Fechamento).
+    """
+    reader = csv.reader(io.TextIOWrapper(arquivo, encoding='utf-8'), delimiter=';')
+    cabecalho = next(reader, None) or []
+    try:
+        i_cnpj = cabecalho.index('CNPJ_FUNDO_CLASSE')
+        i_data = cabecalho.index('DT_COMPTC')
+        i_quota = cabecalho.index('VL_QUOTA')
+    except ValueError:
+        return {}
+    tamanho_minimo = max(i_cnpj, i_data, i_quota) + 1
+
+    results: dict[str, tuple[Decimal, date]] = {}
+    for row in reader:
+        if len(row) < tamanho_minimo or row[i_cnpj] not in cnpj_map:
+            continue
+        dt_comptc_str = row[i_data]
+        vl_quota_str = row[i_quota]
+        if not dt_comptc_str or not vl_quota_str:
+            continue
+
+        try:
+            dt_comptc = date.fromisoformat(dt_comptc_str)
+            vl_quota = Decimal(vl_quota_str)
+        except Exception:
+            # Ignora erros individuais de linha corrompida ou valores inválidos
+            continue
+
+        # Atualiza apenas se for uma data mais recente para este CNPJ
+        clean_cnpj = cnpj_map[row[i_cnpj]]
+        if clean_cnpj not in results or dt_comptc > results[clean_cnpj][1]:
+            results[clean_cnpj] = (vl_quota, dt_comptc)
+    return results
+
+
 def fetch_cvm_quotes(cnpjs: Iterable[str], *, timeout_seconds: int = 15) -> dict[str, tuple[Decimal, date]]:
     """Baixa o arquivo de cotações mensais da CVM e filtra as cotações mais recentes para os CNPJs indicados.
 
@@ -55,51 +105,33 @@ def fetch_cvm_quotes(cnpjs: Iterable[str], *, timeout_seconds: int = 15) -> dict
         (hoje.year - 1 if hoje.month == 1 else hoje.year, 12 if hoje.month == 1 else hoje.month - 1)
     ]
 
-    zip_data = None
+    arquivo_zip = None
     for ano, mes in meses_tentativas:
         url = f"https://dados.cvm.gov.br/dados/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ano}{mes:02d}.zip"
         req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (compatible; freecash/1.0)'})
         try:
             with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:
                 if resp.status == 200:
-                    zip_data = resp.read()
+                    # O informe mensal tem dezenas de MB: é copiado em blocos para um
+                    # arquivo temporário em vez de lido inteiro para a memória
+                    arquivo_zip = tempfile.TemporaryFile()
+                    shutil.copyfileobj(resp, arquivo_zip)
                     break
         except Exception:
+            if arquivo_zip is not None:
+                arquivo_zip.close()
+                arquivo_zip = None
             continue
 
-    if not zip_data:
+    if arquivo_zip is None:
         raise RuntimeError("Não foi possível conectar ou baixar os dados do portal da CVM (tempo limite ou arquivo indisponível).")
 
-    results: dict[str, tuple[Decimal, date]] = {}
-
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_data)) as z:
+        with arquivo_zip, zipfile.ZipFile(arquivo_zip) as z:
             csv_name = z.namelist()[0]
             with z.open(csv_name) as f:
                 # O arquivo da CVM é codificado em utf-8 ou iso-8859-1 e delimitado por ponto e vírgula (;)
-                text_stream = io.TextIOWrapper(f, encoding='utf-8')
-                reader = csv.DictReader(text_stream, delimiter=';')
-                
-                for row in reader:
-                    cnpj_fundo = row.get('CNPJ_FUNDO_CLASSE')
-                    if cnpj_fundo in cnpj_map:
-                        clean_cnpj = cnpj_map[cnpj_fundo]
-                        dt_comptc_str = row.get('DT_COMPTC')
-                        vl_quota_str = row.get('VL_QUOTA')
-
-                        if not dt_comptc_str or not vl_quota_str:
-                            continue
-
-                        try:
-                            dt_comptc = datetime.strptime(dt_comptc_str, "%Y-%m-%d").date()
-                            vl_quota = Decimal(vl_quota_str)
-                            
-                            # Atualiza apenas se for uma data mais recente para este CNPJ
-                            if clean_cnpj not in results or dt_comptc > results[clean_cnpj][1]:
-                                results[clean_cnpj] = (vl_quota, dt_comptc)
-                        except Exception:
-                            # Ignora erros individuais de linha corrompida ou valores inválidos
-                            continue
+                results = _cotacoes_do_csv(f, cnpj_map)
     except Exception as e:
         raise RuntimeError(f"Erro ao descompactar ou processar arquivo CSV da CVM: {str(e)}") from e
 
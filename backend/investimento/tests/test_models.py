@@ -107,3 +107,31 @@ class InvestimentoModelsTestCase(TestCase):
         self.ativo.refresh_from_db()
         self.assertEqual(self.ativo.quantidade, Decimal("0"))
         self.assertEqual(self.ativo.preco_medio, Decimal("0"))
+
+    def test_recalculo_em_lote_igual_ao_individual(self):
+        from investimento.calculators import recalcular_ativo, recalcular_ativos
+
+        outro = Ativo.objects.create(usuario=self.user, ticker="VALE3")
+        sem_transacoes = Ativo.objects.create(usuario=self.user, ticker="ITSA4")
+        for ativo, tipo, qtd, total in (
+            (self.ativo, Transacao.TIPO_COMPRA, "100", "3000.00"),
+            (self.ativo, Transacao.TIPO_COMPRA, "50", "1800.00"),
+            (self.ativo, Transacao.TIPO_VENDA, "30", "1200.00"),
+            (outro, Transacao.TIPO_COMPRA, "10", "700.00"),
+        ):
+            Transacao.objects.create(
+                usuario=self.user, ativo=ativo, tipo=tipo, data=timezone.localdate(),
+                quantidade=Decimal(qtd), valor_total=Decimal(total),
+            )
+        ativos = Ativo.objects.filter(pk__in=[self.ativo.pk, outro.pk, sem_transacoes.pk]).order_by("pk")
+        for ativo in ativos:
+            recalcular_ativo(ativo)
+        esperado = list(ativos.values_list("quantidade", "preco_medio"))
+        ativos.update(quantidade=Decimal("999"), preco_medio=Decimal("1"))
+
+        carregados = list(ativos)
+        with self.assertNumQueries(2):
+            recalcular_ativos(carregados)
+
+        self.assertEqual(list(ativos.values_list("quantidade", "preco_medio")), esperado)
+        self.assertEqual(esperado[0][0], Decimal("120"))
@@ -1,5 +1,10 @@
+import io
+import zipfile
+from unittest import mock
+
 from django.test import SimpleTestCase
 
+from investimento.services.cvm_service import _cotacoes_do_csv, fetch_cvm_quotes
 from investimento.services.tradingview_screener import (
     _build_scan_payload,
     _normalize_to_tradingview_symbol,
@@ -25,6 +30,49 @@ class TradingViewScreenerTests(SimpleTestCase):
         self.assertEqual(payload["range"], [0, 500])
 
 
+class CvmServiceTests(SimpleTestCase):
+    def test_csv_mantem_cotacao_mais_recente_apenas_dos_cnpjs_buscados(self):
+        csv_bytes = (
+            "TP_FUNDO_CLASSE;CNPJ_FUNDO_CLASSE;DT_COMPTC;VL_QUOTA\n"
+            "FI;12.987.743/0001-86;2026-03-02;1.50\n"
+            "FI;12.987.743/0001-86;2026-03-04;1.75\n"
+            "FI;12.987.743/0001-86;2026-03-03;1.60\n"
+            "FI;11.111.111/0001-11;2026-03-05;9.99\n"
+            "FI;12.987.743/0001-86;data-invalida;2.00\n"
+            "FI;12.987.743/0001-86\n"
+        ).encode()
+
+        cotacoes = _cotacoes_do_csv(
+            io.BytesIO(csv_bytes), {"12.987.743/0001-86": "12987743000186"}
+        )
+
+        self.assertEqual(
+            cotacoes, {"12987743000186": (Decimal("1.75"), date(2026, 3, 4))}
+        )
+
+    def test_fetch_le_o_zip_baixado_do_mes_anterior_quando_o_atual_falha(self):
+        conteudo = io.BytesIO()
+        with zipfile.ZipFile(conteudo, "w") as z:
+            z.writestr(
+                "inf_diario_fi.csv",
+                "TP_FUNDO_CLASSE;CNPJ_FUNDO_CLASSE;DT_COMPTC;VL_QUOTA\n"
+                "FI;12.987.743/0001-86;2026-03-04;1.75\n",
+            )
+
+        class Resposta(io.BytesIO):
+            status = 200
+
+        with mock.patch(
+            "investimento.services.cvm_service.urllib.request.urlopen",
+            side_effect=[OSError("indisponível"), Resposta(conteudo.getvalue())],
+        ):
+            cotacoes = fetch_cvm_quotes(["12987743000186"])
+
+        self.assertEqual(
+            cotacoes, {"12987743000186": (Decimal("1.75"), date(2026, 3, 4))}
+        )
+
+
 from django.test import TestCase
 from django.contrib.auth.models import User
 from datetime import date
@@ -74,6 +74,40 @@ class AtivoViewSetTests(APITestCase):
         quote2 = Cotacao.objects.get(ativo=self.ativo, data=datetime.date(2023, 6, 24))
         self.assertEqual(quote2.valor, Decimal("30.40"))
 
+    @patch("urllib.request.urlopen")
+    def test_atualizar_ativo_sobrescreve_cotacao_existente_do_dia(self, mock_urlopen):
+        existente = Cotacao.objects.create(
+            ativo=self.ativo, data=datetime.date(2023, 6, 23), valor=Decimal("29.00")
+        )
+        mock_response = MagicMock()
+        mock_response.read.return_value = json.dumps({
+            "chart": {
+                "result": [
+                    {
+                        # Dois pontos no mesmo dia 24/06: o último prevalece
+                        "timestamp": [1687522800, 1687609200, 1687612800],
+                        "indicators": {"quote": [{"close": [30.15, 30.40, 30.55]}]},
+                    }
+                ],
+                "error": None,
+            }
+        }).encode("utf-8")
+        mock_urlopen.return_value.__enter__.return_value = mock_response
+
+        url = reverse("api-ativo-atualizar", kwargs={"pk": self.ativo.id})
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(Cotacao.objects.filter(ativo=self.ativo).count(), 2)
+        atualizada = Cotacao.objects.get(ativo=self.ativo, data=datetime.date(2023, 6, 23))
+        self.assertEqual(atualizada.uuid, existente.uuid)
+        self.assertEqual(atualizada.valor, Decimal("30.15"))
+        self.assertEqual(
+            Cotacao.objects.get(ativo=self.ativo, data=datetime.date(2023, 6, 24)).valor,
+            Decimal("30.55"),
+        )
+
     def test_atualizar_ativo_sem_ticker_error(self):
         ativo_sem_ticker = Ativo.objects.create(
             usuario=self.user,
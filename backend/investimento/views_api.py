@@ -232,23 +232,30 @@ class AtivoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        count = 0
         from .models import Cotacao
+        # Uma cotação por dia (o último ponto do dia prevalece, como no
+        # update_or_create sequencial)
+        valores_por_dia = {}
         for ts, close in zip(timestamps, close_prices):
             if close is None:
                 continue
             try:
                 # Converte o timestamp UTC para date local
                 dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc).date()
-                Cotacao.objects.update_or_create(
-                    ativo=ativo,
-                    data=dt,
-                    defaults={"valor": Decimal(str(close))}
-                )
-                count += 1
+                valores_por_dia[dt] = Decimal(str(close))
             except Exception:
                 pass
 
+        # Upsert de todo o período em um único INSERT ... ON CONFLICT sobre
+        # (ativo, data), em vez de um SELECT + INSERT/UPDATE por dia
+        Cotacao.objects.bulk_create(
+            [Cotacao(ativo=ativo, data=dt, valor=valor) for dt, valor in valores_por_dia.items()],
+            update_conflicts=True,
+            unique_fields=["ativo", "data"],
+            update_fields=["valor", "atualizada_em"],
+        )
+        count = len(valores_por_dia)
+
         return Response({
             "count": count,
             "message": f"Histórico de {count} cotações atualizado com sucesso."